@@ -0,0 +1,300 @@
+"""
+The program defines a Player class that plays TETRIS by itself. For every
+new block it tries each orientation and column the block can reach, drops it
+and scores the board it leaves behind, optionally looking ahead at the next
+blocks <see preview method of Engine class>. Boards are kept as lists of row
+bit masks <see Board class> so that the search runs in pure Python, and
+scores are kept in a table of recently seen positions keyed by the Zobrist
+hash of the board <see zobristTables>. <see Tetris class> and simulate.py
+for usage.
+"""
+
+from collections import OrderedDict
+from board import *
+from pieces import *
+
+# Weights of the features of a board when ranking placements
+WEIGHTS = {"height": -0.510066, "lines": 0.760666, "holes": -0.35663,
+           "bumpiness": -0.184483}
+
+_shifted = {}  # block type -> masks of every orientation at every column
+
+#-----------------------------------------------------------------------------#
+
+def shiftedMasks(shape,cols=10):
+  """
+  Returns a list with, for every orientation of a block type, the list of
+  its row bit masks moved to every column (None where it does not fit)
+  Parameters: Block type and number of columns of the window
+  """
+
+  key = (shape,cols)
+  if key not in _shifted:
+    table = []
+    for state in ROTATIONS[shape]:
+      table.append([tuple([mask << col for mask in state.masks]) \
+                    if col+state.width <= cols else None \
+                    for col in range(cols)])
+    _shifted[key] = table
+
+  return _shifted[key]
+
+#-----------------------------------------------------------------------------#
+
+def fits(grid,masks,row):
+  """
+  Returns True if a block fits on a board
+  Parameters: List of row bit masks of the board, bit masks of the rows of
+              the block already moved to its column and the row of its
+              lowest cell
+  """
+
+  if row < 0:
+    return False
+  numRows = len(grid)
+  for mask in masks:
+    if row < numRows and grid[row] & mask:
+      return False
+    row = row + 1
+
+  return True
+
+#-----------------------------------------------------------------------------#
+
+def features(grid,numCols):
+  """
+  Returns the sum of the column heights, the number of holes (empty cells
+  under the top of their column) and the bumpiness (sum of the height
+  differences of neighbouring columns) of a board
+  Parameters: List of row bit masks of the board and number of columns
+  """
+
+  heights = [0]*numCols
+  covered = 0  # columns with an occupied cell in a row above
+  holes = 0
+  height = 0
+  for row in range(len(grid)-1,-1,-1):
+    cells = grid[row]
+    if covered:
+      holes += bin(covered & ~cells).count("1")
+    top = cells & ~covered  # columns whose highest cell is in this row
+    if top:
+      covered |= top
+      while top:
+        low = top & -top
+        heights[low.bit_length()-1] = row + 1
+        height += row + 1
+        top ^= low
+
+  bumpiness = 0
+  for col in range(numCols-1):
+    bumpiness += abs(heights[col]-heights[col+1])
+
+  return height, holes, bumpiness
+
+#-----------------------------------------------------------------------------#
+
+class Player(object):
+
+  """
+  A class of Player objects that choose where every block goes
+  Parameters: Dictionary of weights of the features of a board <see
+              WEIGHTS>, number of blocks to look at (the falling one and
+              depth-1 blocks of the preview) and the number of positions
+              kept in the table of scores
+  """
+
+  def __init__(self,weights=WEIGHTS,depth=1,cacheSize=65536):
+
+    # set instance variables
+    self.weights = weights
+    self.depth = depth
+    self.cacheSize = cacheSize
+    self.cache = OrderedDict()  # position -> best score, spins, column
+    self.hits = 0  # number of positions found in the table
+    self.misses = 0
+    self.decisions = 0
+
+#-----------------------------------------------------------------------------#
+
+  def __str__(self):
+    """
+    Returns a string of text describing the player when it is printed
+    """
+
+    s = "Depth: %d" % (self.depth)
+    s = s + "\nDecisions: %d" % (self.decisions)
+    s = s + "\nCached positions: %d (%d hits, %d misses)" \
+        % (len(self.cache),self.hits,self.misses)
+
+    return s
+
+#-----------------------------------------------------------------------------#
+
+  def reachable(self,grid,numCols,shape,rotation,row,col):
+    """
+    Returns the placements a block can reach by spinning where it is and
+    then moving sideways, like the keys the player presses <see keys method>
+    Parameters: List of row bit masks of the board, number of columns, block
+                type and the orientation index, row and column of the block
+    Returns: List of [spins,orientation index,row,column] of the block
+             before it is dropped
+    """
+
+    rotations = ROTATIONS[shape]
+    table = shiftedMasks(shape,numCols)
+    result = []
+    for spins in range(len(rotations)):
+      if spins > 0:
+        # spin like Piece.spin: the top row stays and the block is kept
+        # inside the right side of the window
+        top = row + rotations[rotation].height - 1
+        rotation = (rotation + 1) % len(rotations)
+        row = top - rotations[rotation].height + 1
+        col = min(col,numCols-rotations[rotation].width)
+        if not fits(grid,table[rotation][col],row):
+          break
+      masks = table[rotation]
+      left = col
+      while left > 0 and fits(grid,masks[left-1],row):
+        left -= 1
+      right = col
+      while right+1 < numCols and masks[right+1] != None and \
+            fits(grid,masks[right+1],row):
+        right += 1
+      for c in range(left,right+1):
+        result.append([spins,rotation,row,c])
+
+    return result
+
+#-----------------------------------------------------------------------------#
+
+  def search(self,grid,numCols,shapes,start=None,hash=None):
+    """
+    Returns the best score of a board for a list of upcoming blocks, with
+    the number of spins and the column of the first block that reach it
+    Parameters: List of row bit masks of the board, number of columns, list
+                of block types, [orientation index,row,column] of the first
+                block (the spawn position if None) and the Zobrist hash of
+                the board (worked out from the board if None)
+    Returns: [score,spins,column] or None if no block can be placed
+    """
+
+    numRows = len(grid)
+    tables = zobristTables(numRows,numCols)
+    if hash == None:
+      hash = gridKey(tables,grid)
+    key = (hash,tuple(shapes),tuple(start or ()))
+    cache = self.cache
+    if key in cache:
+      self.hits += 1
+      value = cache.pop(key)
+      cache[key] = value  # most recently used positions go to the end
+      return value
+    self.misses += 1
+
+    shape = shapes[0]
+    if start == None:
+      start = [0,numRows-SPAWN_ROWS[shape],
+               numCols//2-2+SPAWN_COLUMNS[shape]]
+    fullRow = (1 << numCols) - 1
+    weights = self.weights
+    table = shiftedMasks(shape,numCols)
+
+    best = None
+    for spins, rotation, row, col in self.reachable(grid,numCols,shape,
+                                                    *start):
+      # drop the block straight down and put it on a copy of the board
+      masks = table[rotation][col]
+      while fits(grid,masks,row-1):
+        row -= 1
+      if row + len(masks) > numRows:
+        continue  # block would stick out of the top of the window
+      board = list(grid)
+      boardHash = hash
+      for k in range(len(masks)):
+        board[row+k] |= masks[k]
+        boardHash ^= rowKey(tables[row+k],masks[k])
+
+      # remove completed rows
+      rows = [cells for cells in board if cells != fullRow]
+      lines = numRows - len(rows)
+      if lines:
+        board = rows + [0]*lines
+        boardHash = gridKey(tables,board)
+
+      score = weights["lines"]*lines
+      if len(shapes) > 1:
+        value = self.search(board,numCols,shapes[1:],None,boardHash)
+        if value == None:
+          continue
+        score += value[0]
+      else:
+        height, holes, bumpiness = features(board,numCols)
+        score += weights["height"]*height + weights["holes"]*holes + \
+                 weights["bumpiness"]*bumpiness
+      if best == None or score > best[0]:
+        best = [score,spins,col]
+
+    cache[key] = best
+    if len(cache) > self.cacheSize:
+      cache.popitem(last=False)  # forget the least recently used position
+    return best
+
+#-----------------------------------------------------------------------------#
+
+  def choose(self,engine):
+    """
+    Returns the number of spins and the column of the best placement of the
+    falling block of a game, or None if there is none
+    Parameter: Engine object of the game
+    """
+
+    piece = engine.piece
+    if piece == None:
+      return None
+    shapes = [piece.shape] + engine.preview(self.depth-1)
+    start = [piece.rotation,piece.row,piece.col]
+    board = engine.board
+    best = self.search(board.grid,board.numCols,shapes,start,board.hash)
+    self.decisions += 1
+    if best == None:
+      return None
+
+    return best[1:]
+
+#-----------------------------------------------------------------------------#
+
+  def keys(self,engine,drop=True):
+    """
+    Returns the keys that take the falling block of a game to the best
+    placement: spins, then moves sideways and then (if drop) enough moves
+    down to reach the bottom of the window
+    Parameters: Engine object of the game and whether to drop the block
+    """
+
+    choice = self.choose(engine)
+    if choice == None:
+      return []
+    spins, col = choice
+
+    # column of the block after spinning it <see spinPosition method>
+    piece = engine.piece
+    rotations = piece.rotations
+    rotation = piece.rotation
+    start = piece.col
+    for k in range(spins):
+      rotation = (rotation + 1) % len(rotations)
+      start = min(start,piece.numCols-rotations[rotation].width)
+
+    keys = ["Up"]*spins
+    if col < start:
+      keys = keys + ["Left"]*(start-col)
+    else:
+      keys = keys + ["Right"]*(col-start)
+    if drop:
+      keys = keys + ["Down"]*piece.numRows
+
+    return keys
+
+#-----------------------------------------------------------------------------#
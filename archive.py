@@ -0,0 +1,362 @@
+"""
+The program keeps an archive of finished TETRIS games that can grow to
+millions of games. Games are appended as fixed size binary records (seed,
+date, points, level, cleared rows, blocks, steps and length of the game) to
+one file, and the placement of every block of the games (block type,
+orientation, row, column and rows it cleared) to a second file next to it,
+so files are only ever appended to. Both files are read through mmap as
+NumPy arrays of a structured dtype, so queries look at the records in place
+without parsing or loading the files. A third file keeps the game numbers
+sorted by points and by date. NumPy is only needed to read an archive. <see
+simulate.py> for filling one.
+
+To run: python archive.py file [--top N] [--days D]
+"""
+
+import argparse
+import os
+import struct
+import time
+
+try:
+  import numpy
+except ImportError:
+  numpy = None
+
+from randomizer import RANDOMIZER_NAMES
+from pieces import BLOCK_TYPES
+
+GAMES_MAGIC = b"TTAG"
+PIECES_MAGIC = b"TTAP"
+INDEX_MAGIC = b"TTAI"
+VERSION = 1
+# magic, version and size of a record; every file starts with this
+HEADER = struct.Struct("<4sHH")
+
+# name, NumPy type and struct format of every field of a game record.
+# first is the number of the placement record of the first block of the
+# game and placed the number of placement records of the game.
+GAME_FIELDS = [("seed","<u8","Q"),("date","<f8","d"),("points","<u4","I"),
+               ("level","<u2","H"),("lines","<u4","I"),("pieces","<u4","I"),
+               ("steps","<u4","I"),("duration","<f8","d"),("first","<u8","Q"),
+               ("placed","<u4","I"),("randomizer","u1","B")]
+# name, NumPy type and struct format of every field of a placement record:
+# number of the game, step of gravity the block landed on and the block
+# type code <see BLOCK_TYPES in pieces.py>, orientation index, row, column
+# and number of rows it cleared
+PIECE_FIELDS = [("game","<u8","Q"),("step","<u4","I"),("shape","u1","B"),
+                ("rotation","u1","B"),("row","i1","b"),("col","i1","b"),
+                ("lines","u1","B")]
+GAME = struct.Struct("<" + "".join([f[2] for f in GAME_FIELDS]))
+PIECE = struct.Struct("<" + "".join([f[2] for f in PIECE_FIELDS]))
+# number of games indexed; the index file then holds the game numbers
+# sorted by points and the game numbers sorted by date
+INDEX_COUNT = struct.Struct("<Q")
+
+if numpy != None:
+  GAME_DTYPE = numpy.dtype([f[:2] for f in GAME_FIELDS])
+  PIECE_DTYPE = numpy.dtype([f[:2] for f in PIECE_FIELDS])
+
+#-----------------------------------------------------------------------------#
+
+def mapRecords(fileName,dtype,magic):
+  """
+  Returns the records of an archive file as a read-only NumPy array mapped
+  on the file. A record that is only partly written is left out.
+  Parameters: Name of the file, NumPy dtype and magic of its records
+  """
+
+  if numpy == None:
+    raise RuntimeError("reading an archive needs NumPy")
+  if not os.path.exists(fileName):
+    return numpy.zeros(0,dtype)
+  size = os.path.getsize(fileName)
+  count = (size - HEADER.size) // dtype.itemsize
+  if count <= 0:
+    return numpy.zeros(0,dtype)
+  header = numpy.memmap(fileName,numpy.uint8,"r",0,(HEADER.size,))
+  if HEADER.unpack(header.tobytes()) != (magic,VERSION,dtype.itemsize):
+    raise ValueError("%s is not an archive file of version %d"
+                     % (fileName,VERSION))
+
+  return numpy.memmap(fileName,dtype,"r",HEADER.size,(count,))
+
+#-----------------------------------------------------------------------------#
+
+class Archive(object):
+
+  """
+  A class of Archive objects that appends games to an archive and answers
+  queries on it
+  Parameter: Name of the file of the game records (placement records go to
+             fileName.pieces and the index to fileName.index)
+  """
+
+  def __init__(self,fileName):
+
+    # set instance variables
+    self.fileName = fileName
+    self.piecesName = fileName + ".pieces"
+    self.indexName = fileName + ".index"
+    self.gamesFile = None  # files open for appending <see append method>
+    self.piecesFile = None
+    self.count = self.countRecords(fileName,GAME.size)  # number of games
+    self.placed = self.countRecords(self.piecesName,PIECE.size)
+
+#-----------------------------------------------------------------------------#
+
+  def __str__(self):
+    """
+    Returns a string of text describing the archive when it is printed
+    """
+
+    s = "Archive: %s" % (self.fileName)
+    s = s + "\nGames: %d" % (self.count)
+    s = s + "\nPlacements: %d" % (self.placed)
+
+    return s
+
+#-----------------------------------------------------------------------------#
+
+  def __len__(self):
+    return self.count
+
+#-----------------------------------------------------------------------------#
+
+  def countRecords(self,fileName,size):
+    """
+    Returns the number of whole records in an archive file
+    Parameters: Name of the file and size of a record
+    """
+
+    if not os.path.exists(fileName):
+      return 0
+    return max((os.path.getsize(fileName) - HEADER.size) // size,0)
+
+#-----------------------------------------------------------------------------#
+
+  def openFile(self,fileName,magic,size,count):
+    """
+    Opens an archive file for appending, writing its header if it is new
+    and cutting off a record that was only partly written
+    Parameters: Name of the file, magic, size of a record and number of
+                whole records in the file
+    Returns: File object
+    """
+
+    end = HEADER.size + count*size
+    if not os.path.exists(fileName) or os.path.getsize(fileName) < end:
+      archiveFile = open(fileName,"wb")
+      archiveFile.write(HEADER.pack(magic,VERSION,size))
+    else:
+      archiveFile = open(fileName,"r+b")
+      archiveFile.truncate(end)
+      archiveFile.seek(end)
+
+    return archiveFile
+
+#-----------------------------------------------------------------------------#
+
+  def append(self,result,placements=[],date=None):
+    """
+    Appends a game to the archive. Its placement records are written first
+    so a game record never points at placements that are not there.
+    Parameters: Dictionary with the "seed", "points", "level", "lines",
+                "pieces", "steps", "duration" and "randomizer" of the game
+                <see playGame in simulate.py>, list of (step, block type,
+                orientation index, row, column, cleared rows) placements
+                and the time the game ended (now if None)
+    Returns: Number of the game in the archive
+    """
+
+    if self.gamesFile == None:
+      self.piecesFile = self.openFile(self.piecesName,PIECES_MAGIC,
+                                      PIECE.size,self.placed)
+      self.gamesFile = self.openFile(self.fileName,GAMES_MAGIC,GAME.size,
+                                     self.count)
+    if date == None:
+      date = time.time()
+    game = self.count
+
+    records = bytearray()
+    for step, shape, rotation, row, col, lines in placements:
+      records.extend(PIECE.pack(game,step,BLOCK_TYPES.index(shape),rotation,
+                                row,col,lines))
+    self.piecesFile.write(records)
+    self.gamesFile.write(GAME.pack(result["seed"],date,result["points"],
+        result["level"],result["lines"],result["pieces"],result["steps"],
+        result["duration"],self.placed,len(placements),
+        RANDOMIZER_NAMES.index(result.get("randomizer","uniform"))))
+    self.placed += len(placements)
+    self.count += 1
+
+    return game
+
+#-----------------------------------------------------------------------------#
+
+  def flush(self):
+    """
+    Writes the appended games to the files
+    """
+
+    if self.gamesFile != None:
+      self.piecesFile.flush()
+      self.gamesFile.flush()
+
+#-----------------------------------------------------------------------------#
+
+  def close(self):
+    """
+    Closes the files the games are appended to
+    """
+
+    if self.gamesFile != None:
+      self.piecesFile.close()  # placements first, like append
+      self.gamesFile.close()
+      self.gamesFile = self.piecesFile = None
+
+#-----------------------------------------------------------------------------#
+
+  def games(self):
+    """
+    Returns the game records as a NumPy array mapped on the archive
+    """
+
+    self.flush()
+    return mapRecords(self.fileName,GAME_DTYPE,GAMES_MAGIC)
+
+#-----------------------------------------------------------------------------#
+
+  def placements(self,game=None):
+    """
+    Returns placement records as a NumPy array mapped on the archive
+    Parameter: Number of a game, the records of all games if None
+    """
+
+    self.flush()
+    records = mapRecords(self.piecesName,PIECE_DTYPE,PIECES_MAGIC)
+    if game == None:
+      return records
+    record = self.games()[game]
+    first = int(record["first"])
+
+    return records[first:first+int(record["placed"])]
+
+#-----------------------------------------------------------------------------#
+
+  def buildIndex(self):
+    """
+    Writes the index file: the game numbers sorted by points and sorted by
+    date. Games with the same points or date keep the order they were
+    appended in.
+    """
+
+    games = self.games()
+    byPoints = numpy.argsort(games["points"],kind="stable").astype("<u8")
+    byDate = numpy.argsort(games["date"],kind="stable").astype("<u8")
+    indexFile = open(self.indexName,"wb")
+    try:
+      indexFile.write(HEADER.pack(INDEX_MAGIC,VERSION,8))
+      indexFile.write(INDEX_COUNT.pack(len(games)))
+      indexFile.write(byPoints.tobytes())
+      indexFile.write(byDate.tobytes())
+    finally:
+      indexFile.close()
+
+#-----------------------------------------------------------------------------#
+
+  def index(self):
+    """
+    Returns NumPy arrays, mapped on the index file, of the game numbers
+    sorted by points and sorted by date. The index is built again if games
+    were appended since it was built.
+    """
+
+    start = HEADER.size + INDEX_COUNT.size
+    count = None
+    if os.path.exists(self.indexName) and \
+       os.path.getsize(self.indexName) >= start:
+      indexFile = open(self.indexName,"rb")
+      try:
+        header = indexFile.read(start)
+      finally:
+        indexFile.close()
+      if HEADER.unpack_from(header) == (INDEX_MAGIC,VERSION,8):
+        count = INDEX_COUNT.unpack_from(header,HEADER.size)[0]
+    if count != self.count:
+      self.buildIndex()
+      count = self.count
+    if count == 0:
+      return numpy.zeros(0,"<u8"), numpy.zeros(0,"<u8")
+
+    numbers = numpy.memmap(self.indexName,"<u8","r",start,(2*count,))
+    return numbers[:count], numbers[count:]
+
+#-----------------------------------------------------------------------------#
+
+  def top(self,n=10):
+    """
+    Returns the game records of the n games with the most points, best first
+    Parameter: Number of games
+    """
+
+    byPoints = self.index()[0]
+    if n <= 0:
+      return self.games()[:0]
+    return self.games()[byPoints[::-1][:n]]
+
+#-----------------------------------------------------------------------------#
+
+  def between(self,start,end=None):
+    """
+    Returns the game records of the games that ended between two dates, in
+    order of date
+    Parameters: Start and end (now if None) of the dates, in seconds since
+                the epoch like time.time
+    """
+
+    if end == None:
+      end = time.time()
+    games = self.games()
+    byDate = self.index()[1]
+    dates = games["date"][byDate]
+    first, last = numpy.searchsorted(dates,[start,end])
+
+    return games[byDate[first:last]]
+
+#-----------------------------------------------------------------------------#
+
+def main():
+  """
+  Prints a summary of an archive: number of games and placements, mean and
+  best points, the best games and how the block types are placed
+  """
+
+  parser = argparse.ArgumentParser(description="Query a TETRIS archive")
+  parser.add_argument("file")
+  parser.add_argument("--top",type=int,default=5)
+  parser.add_argument("--days",type=float,default=None)
+  args = parser.parse_args()
+
+  archive = Archive(args.file)
+  print(str(archive))
+  if args.days == None:
+    games = archive.games()
+  else:
+    games = archive.between(time.time()-args.days*86400)
+    print("Games of the last %g days: %d" % (args.days,len(games)))
+  if len(games) == 0:
+    return
+  print("Mean points: %.1f" % (games["points"].mean()))
+  print("Mean cleared rows: %.1f" % (games["lines"].mean()))
+  for record in archive.top(args.top):
+    print("seed %d: %d points, level %d, %d rows, %.0f s"
+          % (record["seed"],record["points"],record["level"],
+             record["lines"],record["duration"]))
+  shapes = numpy.bincount(archive.placements()["shape"],
+                          minlength=len(BLOCK_TYPES))
+  for k in range(len(BLOCK_TYPES)):
+    print("%-7s %d" % (BLOCK_TYPES[k],shapes[k]))
+
+#-----------------------------------------------------------------------------#
+if __name__ == "__main__": main()
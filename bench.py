@@ -0,0 +1,404 @@
+"""
+The program times the methods of the Block and Tetris classes that run for
+every block and every frame of a game, on synthetic boards filled from empty
+to nearly full. Games are drawn in a VirtualWin, a GraphWin that needs no
+display and only counts the calls it gets, so the benchmarks run headless.
+For every method and board it reports the median operations per second of
+several runs, the most memory one operation holds at once and the memory it
+keeps, writes them to a JSON file if one is given and fails if a method got
+slower than a stored baseline.
+
+To run: python bench.py [--output FILE] [--baseline FILE]
+                       [--save-baseline] [--tolerance FRACTION]
+"""
+
+from collections import OrderedDict, deque
+import argparse
+import gc
+import json
+import sys
+import time
+
+try:
+  import tracemalloc  # Python 3.4 and later
+except ImportError:
+  tracemalloc = None
+
+from graphics import *
+from block import *
+from tetris import Tetris
+from stats import percentile
+
+HEIGHTS = [0,5,10,15,20]  # number of filled rows of the synthetic boards
+BASELINE = "bench_baseline.json"
+TOLERANCE = 0.4  # fraction of the baseline speed a method may lose
+REPEAT = 15  # number of timed runs of every benchmark, the median counts
+RETRIES = 2  # number of times a benchmark that looks slower is run again
+SHAPES = ["flat","box","rightz","leftz","rightl","leftl","tee"]
+
+clock = getattr(time,"perf_counter",time.time)
+
+class VirtualWin(GraphWin):
+
+  """
+  A class of GraphWin objects that draw nothing. Drawing, moving, deleting
+  and configuring items only hands out item ids and counts the calls, so no
+  Tk window or display is needed.
+  Parameters: Width and height of the window
+  """
+
+  def __init__(self,width=200,height=500):
+
+    # set the instance variables GraphWin.__init__ sets, without Tk
+    self.foreground = "black"
+    self.items = OrderedDict()
+    self.tagged = {}
+    self.mouseX = None
+    self.mouseY = None
+    self.height = int(height)
+    self.width = int(width)
+    self.autoflush = False
+    self._mouseCallback = None
+    self.trans = None
+    self.closed = False
+    self.lastKey = ""
+    self.keys = deque(maxlen=KEY_BUFFER_SIZE)
+    self.count = 0  # number of items created
+    self.calls = 0  # number of calls that would have gone to Tk
+
+#-----------------------------------------------------------------------------#
+
+  def __repr__(self):
+    return "VirtualWin(%d, %d)" % (self.width,self.height)
+
+#-----------------------------------------------------------------------------#
+
+  def _create(self,*args,**options):
+    # stands in for the create_* methods of a Tk canvas
+    self.count += 1
+    self.calls += 1
+    return self.count
+
+  create_rectangle = create_oval = create_line = create_text = _create
+
+#-----------------------------------------------------------------------------#
+
+  def _call(self,*args,**options):
+    # stands in for the other methods of a Tk canvas that are used
+    self.calls += 1
+
+  move = delete = itemconfig = addtag_withtag = dtag = config = _call
+  _moveItems = _call
+  update = update_idletasks = _call
+
+#-----------------------------------------------------------------------------#
+
+  def close(self):
+    self.closed = True
+
+#-----------------------------------------------------------------------------#
+
+def makeGame(height,seed=0):
+  """
+  Returns a Tetris game in a VirtualWin whose lowest rows are filled with
+  squares. Every filled row has one empty cell (in a random column) so no
+  row is complete.
+  Parameters: Number of filled rows and seed of the empty cells
+  """
+
+  game = Tetris(seed=seed,win=VirtualWin())
+  game.introText.undraw()
+  rand = Random(seed)
+  board = game.engine.board
+  size = game.size
+  for row in range(height):
+    hole = rand.randrange(board.numCols)
+    for col in range(board.numCols):
+      if col != hole:
+        top = (board.numRows-1-row)*size
+        square = Rectangle(Point(col*size,top),Point((col+1)*size,top+size))
+        square.draw(game.win)
+        square.setFill("blue")
+        board.fill(row,col)
+        game.lines[row].append(square)
+        game.win.addTag(game.rowTags[row],square)
+
+  return game
+
+#-----------------------------------------------------------------------------#
+
+def landingBlock(game,shape):
+  """
+  Returns a new block of a game, drawn where it lands when it drops
+  straight down from the top of the window
+  Parameters: Tetris object and block type
+  """
+
+  board = game.engine.board
+  piece = Piece(shape,"red",board.numRows,board.numCols)
+  while game.engine.baseClear(piece):
+    piece.moveDown()
+
+  return Block(shape,game.win,piece)
+
+#-----------------------------------------------------------------------------#
+
+def completingGame(height,seed=0):
+  """
+  Returns a Tetris game like makeGame whose top filled row only misses the
+  cells of a flat block, and that block, ready to land and complete it
+  Parameters: Number of filled rows (at least 1) and seed
+  """
+
+  game = makeGame(height-1,seed)
+  board = game.engine.board
+  piece = Piece("flat","red",board.numRows,board.numCols)
+  row = height-1
+  size = game.size
+  for col in range(board.numCols):
+    if col < piece.col or col >= piece.col + piece.state.width:
+      top = (board.numRows-1-row)*size
+      square = Rectangle(Point(col*size,top),Point((col+1)*size,top+size))
+      square.draw(game.win)
+      board.fill(row,col)
+      game.lines[row].append(square)
+      game.win.addTag(game.rowTags[row],square)
+  piece.row = row
+
+  return game, Block("flat",game.win,piece)
+
+#-----------------------------------------------------------------------------#
+
+# Every benchmark is a function of a number of filled rows that returns a
+# pair of functions: setup makes the state of one operation (it is not
+# timed) and run does the operation on it.
+
+def benchBlockInit(height):
+  game = makeGame(height)
+  shapes = SHAPES
+  count = [0]
+  def setup():
+    count[0] += 1
+    return shapes[count[0] % len(shapes)]
+  def run(shape):
+    Block(shape,game.win)
+  return setup, run
+
+def benchSpin(height):
+  game = makeGame(height)
+  block = Block("rightl",game.win)
+  return (lambda: block), Block.spin
+
+def benchGetBoundaries(height):
+  game = makeGame(height)
+  block = landingBlock(game,"tee")
+  return (lambda: block), Block.getBoundaries
+
+def benchBaseClear(height):
+  game = makeGame(height)
+  block = landingBlock(game,"tee")
+  return (lambda: block), game.baseClear
+
+def benchAllLeftClear(height):
+  game = makeGame(height)
+  block = landingBlock(game,"tee")
+  return (lambda: block), game.allLeftClear
+
+def benchAllRightClear(height):
+  game = makeGame(height)
+  block = landingBlock(game,"tee")
+  return (lambda: block), game.allRightClear
+
+def benchAddToLine(height):
+  def setup():
+    game = makeGame(height)
+    return game, landingBlock(game,"leftl")
+  def run(state):
+    game, block = state
+    game.addToLine(block)
+  return setup, run
+
+def benchCheckLines(height):
+  # the block completes the top filled row, so one row is removed
+  def setup():
+    game, block = completingGame(max(height,1))
+    game.addToLine(block)
+    return game, block
+  def run(state):
+    game, block = state
+    game.checkLines(block)
+  return setup, run
+
+def benchAnimateLines(height):
+  # the whole animation of removing the bottom row: grey it out, undraw its
+  # squares and move the rows above it down
+  def setup():
+    return makeGame(height).animateLines([0])
+  def run(animation):
+    for seconds in animation:
+      pass
+  return setup, run
+
+BENCHMARKS = [("Block.__init__",benchBlockInit,2000),
+              ("Block.spin",benchSpin,20000),
+              ("Block.getBoundaries",benchGetBoundaries,20000),
+              ("Tetris.baseClear",benchBaseClear,20000),
+              ("Tetris.allLeftClear",benchAllLeftClear,20000),
+              ("Tetris.allRightClear",benchAllRightClear,20000),
+              ("Tetris.addToLine",benchAddToLine,100),
+              ("Tetris.checkLines",benchCheckLines,100),
+              ("Tetris.animateLines",benchAnimateLines,100)]
+
+#-----------------------------------------------------------------------------#
+
+def measure(bench,height,number,repeat=REPEAT):
+  """
+  Runs a benchmark on a board
+  Parameters: Benchmark function, number of filled rows, number of
+              operations per run and number of runs
+  Returns: Dictionary with the operations per second of the median run
+           ("ops") and of the fastest run ("best"), and per operation the
+           most bytes allocated at once ("bytes", so temporaries count too)
+           and the bytes still allocated when it returns ("kept"), both
+           None without tracemalloc
+  """
+
+  times = []
+  for r in range(repeat):
+    setup, run = bench(height)
+    states = [setup() for k in range(number)]
+    gc.disable()  # like timeit, keep garbage collection out of the timing
+    start = clock()
+    for state in states:
+      run(state)
+    times.append(clock() - start)
+    gc.enable()
+  times.sort()
+
+  result = {"ops": number/max(percentile(times,50),1e-9),
+            "best": number/max(times[0],1e-9), "bytes": None, "kept": None}
+  if tracemalloc != None:
+    setup, run = bench(height)
+    states = [setup() for k in range(number)]
+    peak = kept = 0
+    for state in states:
+      # trace every operation on its own, so the peak is its own and
+      # memory freed that was allocated before it is not counted
+      tracemalloc.start()
+      run(state)
+      current, top = tracemalloc.get_traced_memory()
+      tracemalloc.stop()
+      peak += top
+      kept += current
+    result["bytes"] = peak/float(number)
+    result["kept"] = kept/float(number)
+
+  return result
+
+#-----------------------------------------------------------------------------#
+
+def runAll(heights=HEIGHTS,scale=1.0,keys=None):
+  """
+  Runs every benchmark on every synthetic board
+  Parameters: List of numbers of filled rows, factor the number of
+              operations per run is multiplied by and the list of
+              "method/rows" keys to run (all if None)
+  Returns: Dictionary mapping "method/rows" to the result of measure
+  """
+
+  results = {}
+  for name, bench, number in BENCHMARKS:
+    for height in heights:
+      key = "%s/%d" % (name,height)
+      if keys == None or key in keys:
+        results[key] = measure(bench,height,max(int(number*scale),1))
+
+  return results
+
+#-----------------------------------------------------------------------------#
+
+def compare(results,baseline,tolerance=TOLERANCE):
+  """
+  Returns a list of the benchmarks whose median speed got slower than the
+  baseline allows, as (key, operations per second, baseline operations per
+  second)
+  Parameters: Results of runAll, results stored as baseline and the fraction
+              of the baseline speed a benchmark may lose
+  """
+
+  slower = []
+  for key in sorted(results):
+    if key in baseline:
+      ops = results[key]["ops"]
+      base = baseline[key]["ops"]
+      if ops < base*(1-tolerance):
+        slower.append((key,ops,base))
+
+  return slower
+
+#-----------------------------------------------------------------------------#
+
+def main():
+  """
+  Runs the benchmarks from the command line and exits with status 1 if a
+  benchmark is still slower than the baseline after it was run again
+  """
+
+  parser = argparse.ArgumentParser(description="Benchmark TETRIS methods")
+  parser.add_argument("--output",default=None)
+  parser.add_argument("--baseline",default=BASELINE)
+  parser.add_argument("--save-baseline",action="store_true")
+  parser.add_argument("--tolerance",type=float,default=TOLERANCE)
+  parser.add_argument("--scale",type=float,default=1.0)
+  args = parser.parse_args()
+
+  results = runAll(scale=args.scale)
+  baseline = None
+  if not args.save_baseline:
+    try:
+      baselineFile = open(args.baseline)
+      baseline = json.load(baselineFile)
+      baselineFile.close()
+    except IOError:
+      print("no baseline in %s, run with --save-baseline" % (args.baseline))
+
+  slower = []
+  if baseline != None:
+    slower = compare(results,baseline,args.tolerance)
+    # run the benchmarks that look slower again, so a moment the machine
+    # was busy does not fail the run
+    for k in range(RETRIES):
+      if not slower:
+        break
+      again = runAll(scale=args.scale,keys=[key for key, ops, base in slower])
+      for key in again:
+        if again[key]["ops"] > results[key]["ops"]:
+          results[key] = again[key]
+      slower = compare(results,baseline,args.tolerance)
+
+  for key in sorted(results):
+    result = results[key]
+    line = "%-26s %12.0f ops/s" % (key,result["ops"])
+    if result["bytes"] != None:
+      line = line + " %10.1f bytes/op %8.1f kept/op" % (result["bytes"],
+                                                       result["kept"])
+    print(line)
+
+  if args.output != None:
+    outputFile = open(args.output,"w")
+    json.dump(results,outputFile,indent=2,sort_keys=True)
+    outputFile.close()
+
+  if args.save_baseline:
+    baselineFile = open(args.baseline,"w")
+    json.dump(results,baselineFile,indent=2,sort_keys=True)
+    baselineFile.close()
+    return
+
+  for key, ops, base in slower:
+    print("SLOWER: %s %.0f ops/s (baseline %.0f ops/s)" % (key,ops,base))
+  if slower:
+    sys.exit(1)
+
+#-----------------------------------------------------------------------------#
+if __name__ == "__main__": main()
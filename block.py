@@ -3,74 +3,61 @@ Author: Imoleayo Abel
 
 Date: 27th April 2011
 
-Program Description: The program defines a Block class that creates different
+Program Description: The program defines a Block class that draws different
                      TETRIS blocks and defines various operations/methods on the
                      block like moving, spinning, changing color and many more.
+                     The cells covered by a block are kept by a Piece object
+                     <see Piece class> and the squares on the window follow it.
                      <see Tetris class> for usage of blocks in a TETRIS game.
 """
  
 from graphics import *
-from random import *
-from time import *
-from math import *
-from functions import *
+from engine import *
 
 class Block(object):
 
   """
-  A class of block objects that creates different forms of TETRIS blocks.
-  Parameters: A window, and the preferred block type (shape).
+  A class of block objects that draws different forms of TETRIS blocks.
+  Parameters: The preferred block type (shape), a window, optionally the
+              Piece object of the block <see Piece class> (a new piece at
+              the top of the window is created if none is given) and whether
+              to draw the squares of the block. Blocks that are not drawn
+              only move their piece, the window is then drawn by a Renderer
+              <see Renderer class>.
   """
 
-  def __init__(self,shape,win):
+  count = 0  # number of blocks created, used to give every block its own tag
+
+  def __init__(self,shape,win,piece=None,draw=True):
     
     # set instance variables
     self.win = win
-    self.color = choice(['red','yellow','blue'])
+    if piece == None:
+      piece = Piece(shape)
+    self.piece = piece
+    self.color = piece.color
     w = win.getWidth()
     l = 0.1*w  #length of side of building squares that make up each block
     self.dx = self.dy = l
+    self.numRows = int(round(win.getHeight()/l))
     self.shape = shape
-    self.spinned = 0
+    Block.count += 1
+    self.tag = "block%d" % (Block.count)  # Tk tag shared by all squares
     
-    # set all possible points and rectangles required to build any TETRIS block
-    # form
-    p1 = Point(0.5*w,0)
-    p2 = Point(0.4*w,l)
-    p3 = Point(0.6*w,l)
-    p4 = Point(0.3*w,2*l)
-    p5 = Point(0.5*w,2*l)
-    p6 = Point(0.7*w,2*l)
-
-    r2 = Rectangle(p1,p2)
-    r3 = Rectangle(p1,p3)
-    r5 = Rectangle(p2,p4)
-    r6 = Rectangle(p2,p5)
-    r7 = Rectangle(p3,p5)
-    r8 = Rectangle(p3,p6)
-
-    self.block = None
-
-    # choose and save in a list, squares that correspond to each block type
-    if shape.lower() == "flat":
-      self.block = [r5,r6,r7,r8]
-    elif shape.lower() == "box":
-      self.block = [r2,r3,r6,r7]
-    elif shape.lower() == "rightz":
-      self.block = [r2,r3,r7,r8]
-    elif shape.lower() == "leftz":
-      self.block = [r2,r3,r5,r6]
-    elif shape.lower() == "rightl":
-      self.block = [r2,r6,r7,r8]
-    elif shape.lower() == "leftl":
-      self.block = [r3,r5,r6,r7]
-    elif shape.lower() == "tee":
-      self.block = [r2,r5,r6,r7]
+    # create a square for every cell covered by the piece
+    self.block = []
+    if not draw:
+      return
+    for row, col in piece.getCells():
+      top = (self.numRows-1-row)*l
+      square = Rectangle(Point(col*l,top),Point((col+1)*l,top+l))
+      self.block.append(square)
     
-    # draw and fill squares
+    # draw, fill and tag squares
     for square in self.block:
       square.draw(win)
       square.setFill(self.color)
+      win.addTag(self.tag,square)
     
 #-----------------------------------------------------------------------------#
 
@@ -105,6 +92,25 @@ class Block(object):
 
     return self.block
 
+#-----------------------------------------------------------------------------#
+
+  def getCells(self):
+    """
+    Returns list of [row,column] cells covered by the block, the k-th cell is
+    covered by the k-th square of getBlock()
+    """
+
+    return self.piece.getCells()
+
+#-----------------------------------------------------------------------------#
+
+  def getPiece(self):
+    """
+    Returns the Piece object holding the cells covered by the block
+    """
+
+    return self.piece
+
 #-----------------------------------------------------------------------------#
 
   def getShape(self):
@@ -122,36 +128,72 @@ class Block(object):
     been spinned
     """
 
-    if self.spinned % 2 == 0: # blocks return to original orientation after
-                              # two spins
+    if self.piece.spinned % 2 == 0: # blocks return to original orientation
+                                    # after two spins
       return False
     return True
 
 #-----------------------------------------------------------------------------#
   
   def getBoundaries(self):
-    """a
+    """
     Returns leftmost and rightmost x-coordinates of squares that make up the
     block as well as the topmost and lowest y-coordinates
     Parameters: None
     """
 
-    allX = []
-    allY = []
-    
-    for square in self.block:
-      allX.append(square.getP1().getX())
-      allX.append(square.getP2().getX())
-      allY.append(square.getP1().getY())
-      allY.append(square.getP2().getY())
-      
-    leftMost = getMin(allX)  #see functions.py for getMin and getMax functions
-    rightMost = getMax(allX)
-    topMost = getMin(allY)
-    bottomMost = getMax(allY)
+    left, right, top, bottom = self.piece.getBoundaries()
+    l = self.dx
+
+    leftMost = left*l
+    rightMost = (right+1)*l
+    topMost = (self.numRows-1-top)*l
+    bottomMost = (self.numRows-bottom)*l
 
     return [leftMost,rightMost,topMost,bottomMost]
 
+#-----------------------------------------------------------------------------#
+
+  def follow(self,oldCells):
+    """
+    Moves every square of the block to the cell its piece now covers
+    Parameter: List of [row,column] cells the piece covered before it moved
+    """
+
+    newCells = self.piece.getCells()
+    moves = []
+    for k in range(len(self.block)):
+      dRow = newCells[k][0] - oldCells[k][0]
+      dCol = newCells[k][1] - oldCells[k][1]
+      if dRow != 0 or dCol != 0:
+        moves.append((self.block[k],dCol*self.dx,-dRow*self.dy))
+
+    # all squares are moved with a single call to the window <see moveItems
+    # method of GraphWin class>
+    self.win.moveItems(moves)
+
+#-----------------------------------------------------------------------------#
+
+  def shift(self,dx,dy):
+    """
+    Moves all squares of the block together with a single call to the window
+    <see moveTag method of GraphWin class>
+    Parameters: Distances to move in x and y directions
+    """
+
+    if self.block:
+      self.win.moveTag(self.tag,dx,dy)
+
+#-----------------------------------------------------------------------------#
+
+  def release(self):
+    """
+    Removes the tag shared by the squares of the block once it has landed.
+    The squares stay on the window.
+    """
+
+    self.win.dropTag(self.tag)
+
 #-----------------------------------------------------------------------------#
 
   def moveLeft(self):
@@ -159,15 +201,8 @@ class Block(object):
     Moves block leftwards within the window
     """
 
-    boundaries = self.getBoundaries()
-
-    #check if block is beyond the left end or at the bottom of the window
-    if int(boundaries[0]) >= self.dx and \
-        int(boundaries[3]) <= self.win.getHeight():
-      
-      #move block leftwards
-      for square in self.block: 
-        square.move(-self.dx,0)
+    if self.piece.moveLeft():
+      self.shift(-self.dx,0)  #move block leftwards
 
 #-----------------------------------------------------------------------------#
 
@@ -176,15 +211,8 @@ class Block(object):
     Moves block rightwards within the window
     """
 
-    boundaries = self.getBoundaries()
-
-    #check if block is beyond the riht or at the bottom of the window
-    if int(boundaries[1]) <= (self.win.getWidth() - self.dx) and \
-        int(boundaries[3]) != self.win.getHeight():
-      
-      #move block rightwards
-      for square in self.block:
-        square.move(self.dx,0)
+    if self.piece.moveRight():
+      self.shift(self.dx,0)  #move block rightwards
 
 #-----------------------------------------------------------------------------#
 
@@ -193,14 +221,8 @@ class Block(object):
     Moves block downwards within the window
     """
 
-    boundaries = self.getBoundaries()
-
-    #check if block is one-squareside-length above the bottom of the window
-    if int(boundaries[3]) <= (self.win.getHeight() - self.dy):
-      
-      #move block downwards
-      for square in self.block:
-        square.move(0,self.dy)
+    if self.piece.moveDown():
+      self.shift(0,self.dy)  #move block downwards
 
 #-----------------------------------------------------------------------------#
     
@@ -209,48 +231,8 @@ class Block(object):
     Spins block over an angle of -90 degrees
     """
     
-    l = 0.1*self.win.getWidth()  # length of square sides
-    angle = -0.5*pi
-    boundaries = self.getBoundaries()
-    pivot = Point(int(boundaries[1]),int(boundaries[3]))
-    
-    #check is block is above the base of window
-    if int(boundaries[3]) < self.win.getHeight():
-
-      #spin every square in block
-      for square in self.block:
-        p1, p2 = square.getP1(), square.getP2()
-        centerX = 0.5*(p1.getX() + p2.getX()) # x cordinate of square's center
-        centerY = 0.5*(p1.getY() + p2.getY()) # y cordinate of square's center
-        dx = centerX - boundaries[1]
-        dy = centerY - boundaries[2]
-        mx = (dx * (cos(angle) - 1)) - (dy * sin(angle))
-        my = (dx * sin(angle)) + (dy * (cos(angle) - 1))
-        square.move(mx,my)
-      
-      boundaries = self.getBoundaries() #get new boundaries of block
-
-      #move block appropriately to account for the horizontal displacement due
-      #to rotating
-      if boundaries[0] > 2*l:
-        for square in self.block:
-          if self.shape == "box":
-            square.move(-2*l,0)
-          else:
-            square.move(-3*l,0)
-      elif boundaries[0] == 2*l:
-        for square in self.block:
-          square.move(-2*l,0)
-      elif boundaries[0] == l:
-        for square in self.block:
-          square.move(-l,0)
-      elif boundaries[0] == -l:
-        for square in self.block:
-          square.move(l,0)
-      elif boundaries[0] == -2*l:
-        for square in self.block:
-          square.move(2*l,0)
-
-    self.spinned += 1
+    oldCells = self.piece.getCells()
+    self.piece.spin()
+    self.follow(oldCells)  # move squares to the cells of the spun piece
 
 #-----------------------------------------------------------------------------#
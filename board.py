@@ -0,0 +1,250 @@
+"""
+The program defines a Board class that keeps track of which cells of the
+TETRIS window are occupied by squares of blocks that have landed. <see
+Tetris class> for usage of the board when checking if a block is clear to
+move. Every board also keeps a 64-bit Zobrist hash of its occupied cells
+that is updated as squares land and rows are removed, so equal boards can be
+found in O(1).
+"""
+
+from random import Random
+
+ZOBRIST_SEED = 2011  # every board of the same size uses the same cell keys
+CHUNK_BITS = 5  # number of columns looked up at a time <see zobristTables>
+
+_zobrist = {}  # (rows, columns) -> Zobrist tables
+
+def zobristTables(rows,cols):
+  """
+  Returns the Zobrist tables of boards with the given number of rows and
+  columns. Every cell gets a random 64-bit key and the key of a set of cells
+  is the XOR of their keys. The columns of a row are split into chunks of
+  CHUNK_BITS columns and tables[row][k][cells] is the key of the cells of
+  the k-th chunk of the row, so a whole row is hashed with one lookup per
+  chunk.
+  Parameters: Number of rows and number of columns
+  """
+
+  key = (rows,cols)
+  if key not in _zobrist:
+    random = Random(ZOBRIST_SEED)
+    tables = []
+    for row in range(rows):
+      chunks = []
+      for first in range(0,cols,CHUNK_BITS):
+        size = min(CHUNK_BITS,cols-first)
+        cellKeys = [random.getrandbits(64) for col in range(size)]
+        table = [0]*(1 << size)
+        for cells in range(1,1 << size):
+          low = cells & -cells
+          table[cells] = table[cells ^ low] ^ cellKeys[low.bit_length()-1]
+        chunks.append(table)
+      tables.append(chunks)
+    _zobrist[key] = tables
+
+  return _zobrist[key]
+
+#-----------------------------------------------------------------------------#
+
+def rowKey(chunks,cells):
+  """
+  Returns the Zobrist key of the occupied cells of a row
+  Parameters: Zobrist tables of the row <see zobristTables> and bit mask of
+              the occupied cells
+  """
+
+  key = 0
+  k = 0
+  while cells:
+    key ^= chunks[k][cells & ((1 << CHUNK_BITS) - 1)]
+    cells >>= CHUNK_BITS
+    k += 1
+
+  return key
+
+#-----------------------------------------------------------------------------#
+
+def gridKey(tables,grid):
+  """
+  Returns the Zobrist hash of a list of row bit masks
+  Parameters: Zobrist tables <see zobristTables> and list of row bit masks
+  """
+
+  key = 0
+  for row in range(len(grid)):
+    if grid[row]:
+      key ^= rowKey(tables[row],grid[row])
+
+  return key
+
+#-----------------------------------------------------------------------------#
+
+class Board(object):
+
+  """
+  A class of Board objects that stores an occupancy grid of the cells of a
+  TETRIS window. Every row is kept as an integer whose c-th bit is set when
+  the c-th cell (counting from the left) of the row is occupied. Rows are
+  counted upwards with row 0 being the bottom row of the window. The number
+  of occupied cells of every row is counted as squares land so that full
+  rows are found without looking at their cells. The color of the square in
+  every occupied cell is kept too (None for empty cells).
+  Parameters: Number of rows and number of columns in the window
+  """
+
+  def __init__(self,rows=25,cols=10):
+
+    # set instance variables
+    self.numRows = rows
+    self.numCols = cols
+    self.fullRow = (1 << cols) - 1  # value of a row with all cells occupied
+    self.grid = [0]*rows
+    self.counts = [0]*rows  # number of occupied cells in every row
+    self.colors = [[None]*cols for row in range(rows)]  # color of every cell
+    self.overflow = False  # True once a square lands above the top row
+    self.keys = zobristTables(rows,cols)
+    self.hash = 0  # Zobrist hash of the occupied cells <see zobristTables>
+
+#-----------------------------------------------------------------------------#
+
+  def __str__(self):
+    """
+    Returns a string of text drawing the occupied cells of the board when it
+    is printed
+    """
+
+    s = ""
+    for row in range(self.numRows-1,-1,-1):
+      for col in range(self.numCols):
+        if self.grid[row] >> col & 1:
+          s = s + "#"
+        else:
+          s = s + "."
+      s = s + "\n"
+
+    return s
+
+#-----------------------------------------------------------------------------#
+
+  def isOccupied(self,row,col):
+    """
+    Returns True if a cell is occupied. Cells beyond the sides or the bottom
+    of the window count as occupied while cells above its top do not.
+    Parameters: Row and column of the cell
+    """
+
+    if col < 0 or col >= self.numCols or row < 0:
+      return True
+    if row >= self.numRows:
+      return False
+    return self.grid[row] >> col & 1 == 1
+
+#-----------------------------------------------------------------------------#
+
+  def fill(self,row,col,color="grey"):
+    """
+    Marks a cell as occupied
+    Parameters: Row and column of the cell and color of its square
+    """
+
+    if row >= self.numRows:  # square landed above the top of the window
+      self.overflow = True
+    elif row >= 0 and not self.grid[row] >> col & 1:
+      self.grid[row] |= 1 << col
+      self.counts[row] += 1
+      self.hash ^= rowKey(self.keys[row],1 << col)
+      self.colors[row][col] = color
+
+#-----------------------------------------------------------------------------#
+
+  def fits(self,masks,row,col):
+    """
+    Returns True if a block fits on the board without overlapping occupied
+    cells or sticking out of the sides or the bottom of the window
+    Parameters: Bit masks of the rows of the block <see Rotation class>, and
+                the row and column of its lowest and leftmost cell
+    """
+
+    if row < 0 or col < 0:
+      return False
+    grid = self.grid
+    for mask in masks:
+      mask = mask << col
+      if mask > self.fullRow:  # block sticks out of the right of the window
+        return False
+      if row < self.numRows and grid[row] & mask:
+        return False
+      row = row + 1
+
+    return True
+
+#-----------------------------------------------------------------------------#
+
+  def place(self,masks,row,col,color="grey"):
+    """
+    Marks the cells covered by a block as occupied
+    Parameters: Bit masks of the rows of the block <see Rotation class>, the
+                row and column of its lowest and leftmost cell and the color
+                of the block
+    """
+
+    for mask in masks:
+      if row >= self.numRows:  # block landed above the top of the window
+        self.overflow = True
+        return
+      if row >= 0:
+        self.grid[row] |= mask << col
+        self.counts[row] += bin(mask).count("1")
+        self.hash ^= rowKey(self.keys[row],mask << col)
+        colors = self.colors[row]
+        for c in range(col,col+mask.bit_length()):
+          if mask >> (c-col) & 1:
+            colors[c] = color
+      row = row + 1
+
+#-----------------------------------------------------------------------------#
+
+  def isFull(self,row):
+    """
+    Returns True if every cell in a row is occupied
+    Parameter: Row index
+    """
+
+    return self.counts[row] == self.numCols
+
+#-----------------------------------------------------------------------------#
+
+  def isEmpty(self,row):
+    """
+    Returns True if no cell in a row is occupied
+    Parameter: Row index
+    """
+
+    return self.counts[row] == 0
+
+#-----------------------------------------------------------------------------#
+
+  def removeRow(self,row):
+    """
+    Deletes a row from the board and moves every row above it one step down
+    Parameter: Row index
+    """
+
+    grid = self.grid
+    keys = self.keys
+    # take the rows from the removed one up out of the hash and put them
+    # back one step lower
+    for r in range(row,self.numRows):
+      if grid[r]:
+        self.hash ^= rowKey(keys[r],grid[r])
+    del grid[row]
+    grid.append(0)  # add an empty row at the top of the board
+    del self.counts[row]
+    self.counts.append(0)
+    del self.colors[row]
+    self.colors.append([None]*self.numCols)
+    for r in range(row,self.numRows):
+      if grid[r]:
+        self.hash ^= rowKey(keys[r],grid[r])
+
+#-----------------------------------------------------------------------------#
@@ -0,0 +1,500 @@
+"""
+The program defines the Piece and Engine classes that run a game of TETRIS
+without any graphics. The engine keeps the falling piece, the board of
+landed squares, gravity, line clears and scoring. <see Tetris class> and
+<see Block class> for drawing an engine's game on screen. Blocks are moved
+and checked against the board with the bit masks of the tables in pieces.py.
+Events of the game are pushed to an EventStream when one is attached <see
+events.py>.
+"""
+
+from random import *
+from board import *
+from pieces import *
+from randomizer import *
+from events import *
+
+COLORS = ['red','yellow','blue']
+FRAME_RATE = 60  # frames per second of the game clock <see tick method>
+
+class Piece(object):
+
+  """
+  A class of Piece objects that stores the position and orientation of a
+  TETRIS block. Rows are counted upwards from the bottom row (row 0) of the
+  window and columns rightwards from its leftmost column (column 0). The
+  position of a piece is the row and column of the lowest and leftmost cell
+  of its orientation <see Rotation class>.
+  Parameters: Block type (shape), color, and the number of rows and columns
+              of the window
+  """
+
+  def __init__(self,shape,color=None,rows=25,cols=10):
+
+    # set instance variables
+    self.shape = shape.lower()
+    if color == None:
+      color = choice(COLORS)
+    self.color = color
+    self.numRows = rows
+    self.numCols = cols
+    self.spinned = 0
+    self.rotations = ROTATIONS[self.shape]  # see pieces.py
+    self.rotation = 0  # index of current orientation in self.rotations
+    self.state = self.rotations[0]
+
+    # place block on the top rows in the middle of the window
+    self.row = rows - SPAWN_ROWS[self.shape]
+    self.col = cols//2 - 2 + SPAWN_COLUMNS[self.shape]
+
+#-----------------------------------------------------------------------------#
+
+  def __str__(self):
+    """
+    Returns a string of text describing a piece when it is printed
+    """
+
+    s = "Block Type: %s" % (self.shape)
+    s = s + "\nCells: %s" % (self.getCells())
+
+    return s
+
+#-----------------------------------------------------------------------------#
+
+  def getCells(self):
+    """
+    Returns list of [row,column] cells covered by the piece
+    """
+
+    row = self.row
+    col = self.col
+    return [[row+dRow,col+dCol] for dRow, dCol in self.state.cells]
+
+#-----------------------------------------------------------------------------#
+
+  def getMasks(self):
+    """
+    Returns the bit masks of the rows of the piece <see Rotation class>
+    """
+
+    return self.state.masks
+
+#-----------------------------------------------------------------------------#
+
+  def getBoundaries(self):
+    """
+    Returns leftmost and rightmost columns of the piece as well as its
+    topmost and lowest rows
+    """
+
+    state = self.state
+    return [self.col,self.col+state.width-1,self.row+state.height-1,self.row]
+
+#-----------------------------------------------------------------------------#
+
+  def move(self,dRow,dCol):
+    """
+    Moves piece dRow rows upwards and dCol columns rightwards
+    Parameters: Number of rows and number of columns to move
+    """
+
+    self.row += dRow
+    self.col += dCol
+
+#-----------------------------------------------------------------------------#
+
+  def moveLeft(self):
+    """
+    Moves piece one column leftwards if it is not at the left end of the
+    window. Returns True if the piece moved.
+    """
+
+    if self.col > 0:
+      self.col -= 1
+      return True
+    return False
+
+#-----------------------------------------------------------------------------#
+
+  def moveRight(self):
+    """
+    Moves piece one column rightwards if it is not at the right end of the
+    window. Returns True if the piece moved.
+    """
+
+    if self.col + self.state.width < self.numCols:
+      self.col += 1
+      return True
+    return False
+
+#-----------------------------------------------------------------------------#
+
+  def moveDown(self):
+    """
+    Moves piece one row downwards if it is not at the bottom of the window.
+    Returns True if the piece moved.
+    """
+
+    if self.row > 0:
+      self.row -= 1
+      return True
+    return False
+
+#-----------------------------------------------------------------------------#
+
+  def spinPosition(self):
+    """
+    Returns the orientation index, row and column the piece would have after
+    spinning it over an angle of -90 degrees. The top row and the leftmost
+    column of the piece stay in place unless the spun piece would stick out
+    of the right of the window.
+    """
+
+    rotation = (self.rotation + 1) % len(self.rotations)
+    state = self.rotations[rotation]
+    top = self.row + self.state.height - 1
+    col = min(self.col,self.numCols-state.width)
+
+    return [rotation,top-state.height+1,col]
+
+#-----------------------------------------------------------------------------#
+
+  def spin(self):
+    """
+    Spins piece over an angle of -90 degrees
+    """
+
+    self.rotation, self.row, self.col = self.spinPosition()
+    self.state = self.rotations[self.rotation]
+    self.spinned += 1
+
+#-----------------------------------------------------------------------------#
+
+class Engine(object):
+
+  """
+  A class of Engine objects that runs a game of TETRIS without any graphics
+  Parameters: Number of rows and number of columns of the game window, seed
+              of the random choice of blocks and colors, the factor the time
+              between two steps of gravity is multiplied by at every new
+              level, the number of points per level, the number of points
+              that ends the game and the randomizer that deals out block
+              types (a Randomizer object or the name of one, seeded from
+              the seed of the game <see randomizer.py>)
+  """
+
+  def __init__(self,rows=25,cols=10,seed=None,speedUp=0.9,levelPoints=100,
+               winPoints=2000,randomizer="uniform"):
+
+    # set instance variables
+    self.board = Board(rows,cols)  # occupancy grid of landed squares
+    self.seed = checkSeed(seed)  # <see checkSeed in randomizer.py>
+    self.random = Random(self.seed)  # games with the same seed get the same
+                                     # blocks
+    if not isinstance(randomizer,Randomizer):
+      randomizer = makeRandomizer(randomizer,self.random.getrandbits(32))
+    self.randomizer = randomizer  # deals out block types
+    self.speedUp = speedUp
+    self.levelPoints = levelPoints
+    self.winPoints = winPoints
+    self.points = 0
+    self.level = 1
+    self.time = 0.65  # seconds between two steps of gravity
+    self.piece = None  # piece that is currently falling
+    self.over = False
+    self.frameRate = FRAME_RATE
+    self.frames = 0  # number of frames the game clock has run
+    self.clock = 0.0  # seconds since the last step of gravity
+    self.stream = None  # EventStream the events of the game are pushed to,
+                        # no events are made if None
+
+    # statistics of the game
+    self.lines = 0  # number of cleared rows
+    self.pieces = 0  # number of spawned blocks
+    self.steps = 0  # number of steps of gravity
+    self.duration = 0.0  # game time in seconds spent in steps of gravity
+
+#-----------------------------------------------------------------------------#
+
+  def __str__(self):
+    """
+    Returns a string of text describing the game when it is printed
+    """
+
+    s = "Current Point: %d" % (self.points)
+    s = s + "\nCurrent Level: %d" % (self.level)
+    s = s + "\n" + str(self.board)
+
+    return s
+
+#-----------------------------------------------------------------------------#
+
+  def spawn(self,shape=None):
+    """
+    Creates a new falling piece at the top of the window
+    Parameter: Block type, a random one is chosen if none is given
+    Returns: The new Piece object
+    """
+
+    if shape == None:
+      shape = self.randomizer.next()
+    color = self.random.choice(COLORS)
+    piece = Piece(shape,color,self.board.numRows,self.board.numCols)
+    self.piece = piece
+    self.pieces += 1
+    if not self.board.fits(piece.getMasks(),piece.row,piece.col):
+      self.over = True  # no room left for the piece
+    if self.stream != None:
+      self.stream.push(Spawn(self.frames,shape,color))
+      if self.over:
+        self.stream.push(GameOver(self.frames,self.points,self.lines))
+
+    return self.piece
+
+#-----------------------------------------------------------------------------#
+
+  def preview(self,n=1):
+    """
+    Returns a list of the next n block types that will be spawned
+    Parameter: Number of block types
+    """
+
+    return self.randomizer.peek(n)
+
+#-----------------------------------------------------------------------------#
+
+  def canMove(self,piece,dRow,dCol):
+    """
+    Returns True if a piece can move dRow rows upwards and dCol columns
+    rightwards without running into landed squares or the window sides
+    Parameters: Piece object, number of rows and number of columns to move
+    """
+
+    return self.board.fits(piece.getMasks(),piece.row+dRow,piece.col+dCol)
+
+#-----------------------------------------------------------------------------#
+
+  def baseClear(self,piece):
+    """
+    Returns True if the base of a piece is clear of landed squares and of the
+    bottom of the window
+    Parameter: Piece object
+    """
+
+    return self.canMove(piece,-1,0)
+
+#-----------------------------------------------------------------------------#
+
+  def leftClear(self,piece):
+    """
+    Returns True if the left side of a piece is clear
+    Parameter: Piece object
+    """
+
+    return self.canMove(piece,0,-1)
+
+#-----------------------------------------------------------------------------#
+
+  def rightClear(self,piece):
+    """
+    Returns True if the right side of a piece is clear
+    Parameter: Piece object
+    """
+
+    return self.canMove(piece,0,1)
+
+#-----------------------------------------------------------------------------#
+
+  def spinClear(self,piece):
+    """
+    Returns True if a piece has room to spin
+    Parameter: Piece object
+    """
+
+    rotation, row, col = piece.spinPosition()
+    return self.board.fits(piece.rotations[rotation].masks,row,col)
+
+#-----------------------------------------------------------------------------#
+
+  def press(self,key):
+    """
+    Moves or spins the falling piece like the arrow keys do in a game
+    Parameter: Name of the key ("Left", "Right", "Down" or "Up")
+    Returns: True if the piece moved
+    """
+
+    piece = self.piece
+    if piece == None or self.over:
+      return False
+    if key == "Left" and self.leftClear(piece):
+      return piece.moveLeft()
+    elif key == "Right" and self.rightClear(piece):
+      return piece.moveRight()
+    elif key == "Down" and self.baseClear(piece):
+      return piece.moveDown()
+    elif key == "Up" and self.spinClear(piece):
+      piece.spin()
+      return True
+    return False
+
+#-----------------------------------------------------------------------------#
+
+  def place(self,piece):
+    """
+    Marks the cells covered by a piece that has landed as occupied
+    Parameter: Piece object
+    """
+
+    self.board.place(piece.getMasks(),piece.row,piece.col,piece.color)
+    if self.stream != None:
+      self.stream.push(Lock(self.frames,piece.shape,piece.rotation,piece.row,
+                            piece.col))
+
+#-----------------------------------------------------------------------------#
+
+  def clearLines(self,piece=None):
+    """
+    Removes completed rows from the board. Only the rows covered by the given
+    piece are checked since no other row can have been completed by it.
+    Parameter: Piece object that has just been placed, all rows are checked
+               if None
+    Returns: List of the indices of the removed rows, in order of removal
+    """
+
+    board = self.board
+    if piece == None:
+      rows = range(board.numRows)
+    else:
+      bottom = piece.row
+      top = min(bottom+piece.state.height,board.numRows)
+      rows = range(max(bottom,0),top)
+
+    full = [row for row in rows if board.isFull(row)]
+    cleared = []
+    for k in range(len(full)):
+      # every row removed before moves the rows above it one step down
+      board.removeRow(full[k]-k)
+      cleared.append(full[k]-k)
+    self.lines += len(cleared)
+    if cleared and self.stream != None:
+      self.stream.push(LineClear(self.frames,cleared))
+
+    return cleared
+
+#-----------------------------------------------------------------------------#
+
+  def addPoints(self,points):
+    """
+    Adds points earned for completed rows to the score. Every 100 points (or
+    levelPoints) move the game one level up and make the blocks drop faster.
+    Parameter: Number of points earned
+    Returns: True if the game moved to the next level
+    """
+
+    self.points += points
+    levelUp = False
+    if self.points > 0 and self.points%self.levelPoints == 0 and points != 0:
+      self.time *= self.speedUp  # increase block speed
+      self.level = self.level + 1
+      if self.points == self.winPoints:
+        self.over = True  # end game at 2000 points
+      levelUp = True
+    if self.stream != None:
+      # points are added after every block lands, so this is where a game
+      # that has piled up to the top of the window is seen to end
+      if levelUp:
+        self.stream.push(LevelUp(self.frames,self.level,self.points))
+      if self.isOver():
+        self.stream.push(GameOver(self.frames,self.points,self.lines))
+    return levelUp
+
+#-----------------------------------------------------------------------------#
+
+  def lock(self):
+    """
+    Places the falling piece on the board and clears completed rows
+    Returns: Number of points earned
+    """
+
+    self.place(self.piece)
+    points = 10*len(self.clearLines(self.piece))
+    self.addPoints(points)
+    self.piece = None
+
+    return points
+
+#-----------------------------------------------------------------------------#
+
+  def topClear(self):
+    """
+    Returns True if landed squares have not piled up to the top of the window
+    """
+
+    board = self.board
+    return not board.overflow and board.isEmpty(board.numRows-1)
+
+#-----------------------------------------------------------------------------#
+
+  def isOver(self):
+    """
+    Returns True if the game has ended
+    """
+
+    return self.over or not self.topClear()
+
+#-----------------------------------------------------------------------------#
+
+  def step(self):
+    """
+    Runs one step of gravity: the falling piece moves one row down or, if its
+    base is not clear, lands and a new piece is spawned
+    Returns: Number of points earned
+    """
+
+    if self.isOver():
+      return 0
+    self.steps += 1
+    self.duration += self.time
+    if self.piece == None:
+      self.spawn()
+      return 0
+    if self.baseClear(self.piece):
+      self.piece.moveDown()
+      return 0
+    points = self.lock()
+    if not self.isOver():
+      self.spawn()
+
+    return points
+
+#-----------------------------------------------------------------------------#
+
+  def tick(self):
+    """
+    Moves the game clock one frame (1/frameRate seconds) on. Gravity runs on
+    the accumulated clock so that blocks drop every self.time seconds however
+    many frames that takes.
+    Returns: True if a step of gravity is due
+    """
+
+    self.frames += 1
+    self.clock += 1.0/self.frameRate
+    if self.clock >= self.time:
+      self.clock -= self.time
+      return True
+    return False
+
+#-----------------------------------------------------------------------------#
+
+  def frame(self):
+    """
+    Runs one frame of the game: the clock moves on and a step of gravity is
+    run when one is due <see tick and step methods>
+    Returns: Number of points earned
+    """
+
+    if self.tick():
+      return self.step()
+    return 0
+
+#-----------------------------------------------------------------------------#
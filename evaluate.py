@@ -0,0 +1,166 @@
+"""
+The program scores every placement (orientation and column) of a TETRIS
+block on a board in one batch of NumPy array operations. For each placement
+it finds the row the block lands on and the number of completed rows, holes,
+bumpiness and heights of the board after the completed rows are removed.
+<see pieces.py> for the orientations.
+
+Requires NumPy.
+"""
+
+import numpy as np
+
+from board import *
+from pieces import *
+from ai import WEIGHTS  # weights of the features when ranking placements
+
+_placements = {}  # (block type, columns) -> arrays describing placements
+
+#-----------------------------------------------------------------------------#
+
+def boardArray(board):
+  """
+  Returns a board as a rows x columns uint8 array with 1 for occupied cells.
+  Row 0 is the bottom row of the window.
+  Parameter: Board object <see Board class>, Engine object or an array
+  """
+
+  if hasattr(board,"board"):  # Engine object
+    board = board.board
+  if isinstance(board,Board):
+    grid = np.array(board.grid,dtype=np.int64)
+    shifts = np.arange(board.numCols)
+    return ((grid[:,None] >> shifts[None,:]) & 1).astype(np.uint8)
+  return np.asarray(board,dtype=np.uint8)
+
+#-----------------------------------------------------------------------------#
+
+def placements(shape,cols=10):
+  """
+  Returns a dictionary of arrays describing every placement of a block type
+  on a board with the given number of columns: "rotation" and "col" (P,)
+  give the orientation index and leftmost column of each of the P
+  placements, "rows" and "cols" (P,4) the row offsets and the columns of
+  its squares, and "height" (P,) the height of the orientation
+  """
+
+  key = (shape,cols)
+  if key not in _placements:
+    rotation, left, rows, columns, height = [], [], [], [], []
+    for r in range(len(ROTATIONS[shape])):
+      state = ROTATIONS[shape][r]
+      for col in range(cols-state.width+1):
+        rotation.append(r)
+        left.append(col)
+        rows.append([dRow for dRow, dCol in state.cells])
+        columns.append([col+dCol for dRow, dCol in state.cells])
+        height.append(state.height)
+    _placements[key] = {"rotation": np.array(rotation),
+                        "col": np.array(left),
+                        "rows": np.array(rows),
+                        "cols": np.array(columns),
+                        "height": np.array(height)}
+
+  return _placements[key]
+
+#-----------------------------------------------------------------------------#
+
+def columnHeights(boards):
+  """
+  Returns the height of every column of a batch of boards, that is the index
+  of its highest occupied cell plus one (0 for empty columns)
+  Parameter: Array of boards (..., rows, columns)
+  """
+
+  numRows = boards.shape[-2]
+  levels = np.arange(1,numRows+1).reshape((numRows,1))
+  return (boards*levels).max(axis=-2)
+
+#-----------------------------------------------------------------------------#
+
+def evaluate(board,shape):
+  """
+  Evaluates every placement of a block type on a board at once. A block is
+  dropped straight down from above the board in each orientation and column.
+  Parameters: Board (array, Board or Engine object <see boardArray>) and
+              block type
+  Returns: Dictionary of arrays with one entry per placement: "rotation",
+           "col" and "row" (lowest row of the landed block), "valid" (False
+           if the block would stick out of the top of the window), "lines"
+           (completed rows), "holes" (empty cells under the top of their
+           column), "bumpiness" (sum of height differences of neighbouring
+           columns), "height" (sum of column heights), "maxHeight" and
+           "boards" (boards after completed rows are removed)
+  """
+
+  board = boardArray(board)
+  numRows, numCols = board.shape
+  place = placements(shape,numCols)
+  count = len(place["col"])
+  index = np.arange(count)
+
+  # the block lands on the row where its lowest square in some column rests
+  # on top of that column
+  heights = columnHeights(board)
+  row = (heights[place["cols"]] - place["rows"]).max(axis=1)
+  valid = row + place["height"] <= numRows
+
+  # put the block on a copy of the board for every valid placement
+  boards = np.repeat(board[None,:,:],count,axis=0)
+  cellRows = np.minimum(row[:,None] + place["rows"],numRows-1)
+  boards[index[valid,None],cellRows[valid],place["cols"][valid]] = 1
+
+  # remove completed rows: sort every board so that rows that are not full
+  # come first (keeping their order) and empty the rows that are left on top
+  full = boards.all(axis=2)
+  lines = full.sum(axis=1)
+  order = np.argsort(full,axis=1,kind="mergesort")
+  boards = boards[index[:,None],order]
+  levels = np.arange(numRows)
+  boards[levels[None,:] >= (numRows-lines)[:,None]] = 0
+
+  # features of the boards after removing completed rows
+  heights = columnHeights(boards)
+  below = levels[None,:,None] < heights[:,None,:]
+  holes = (below & (boards == 0)).sum(axis=(1,2))
+  bumpiness = np.abs(np.diff(heights,axis=1)).sum(axis=1)
+
+  result = {"rotation": place["rotation"], "col": place["col"], "row": row,
+            "valid": valid, "lines": np.where(valid,lines,0), "holes": holes,
+            "bumpiness": bumpiness, "height": heights.sum(axis=1),
+            "maxHeight": heights.max(axis=1), "boards": boards}
+  return result
+
+#-----------------------------------------------------------------------------#
+
+def rank(result,weights=WEIGHTS):
+  """
+  Returns the weighted score of every placement of an evaluation, invalid
+  placements get minus infinity
+  Parameters: Dictionary returned by evaluate and dictionary of weights
+  """
+
+  score = np.zeros(len(result["col"]))
+  for feature in weights:
+    score = score + weights[feature]*result[feature]
+
+  return np.where(result["valid"],score,-np.inf)
+
+#-----------------------------------------------------------------------------#
+
+def best(board,shape,weights=WEIGHTS):
+  """
+  Returns the [orientation index,column] of the best placement of a block
+  type on a board, or None if no placement is valid
+  Parameters: Board, block type and dictionary of weights
+  """
+
+  result = evaluate(board,shape)
+  score = rank(result,weights)
+  k = int(np.argmax(score))
+  if score[k] == -np.inf:
+    return None
+
+  return [int(result["rotation"][k]),int(result["col"][k])]
+
+#-----------------------------------------------------------------------------#
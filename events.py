@@ -0,0 +1,324 @@
+"""
+The program defines the events of a game of TETRIS (a block appears, a block
+lands, rows are cleared, the game moves a level up and the game ends) and an
+EventStream class that hands them out to consumers. An Engine only makes
+events when a stream is attached to it <see Engine class>, and the stream
+keeps them in a buffer until it is flushed, so consumers run in batches
+outside the frames of the game. Consumers are generators that get lists of
+events sent to them:
+
+  def consumer():
+    while True:
+      events = yield
+      ...
+
+When the buffer is full the stream either flushes it right away, so the game
+waits for its consumers, or drops the oldest events and counts them.
+"""
+
+from collections import deque
+
+CAPACITY = 256  # number of events a stream keeps before it is full
+
+class Event(object):
+
+  """
+  A class of Event objects that describes something that happened in a
+  game. Subclasses name their fields in fields.
+  Parameter: Frame of the game clock the event happened on
+  """
+
+  __slots__ = ("frame",)
+  kind = "Event"
+  fields = ("frame",)
+
+  def __init__(self,frame):
+
+    # set instance variables
+    self.frame = frame
+
+#-----------------------------------------------------------------------------#
+
+  def __str__(self):
+    """
+    Returns a line of text with the kind of the event and its fields (the
+    items of list fields are joined by commas)
+    """
+
+    words = [self.kind]
+    for name in self.fields:
+      value = getattr(self,name)
+      if isinstance(value,list):
+        words.append(",".join([str(item) for item in value]))
+      else:
+        words.append(str(value))
+
+    return " ".join(words)
+
+#-----------------------------------------------------------------------------#
+
+  def __repr__(self):
+    return "%s(%s)" % (self.kind,", ".join([repr(getattr(self,name)) \
+                                             for name in self.fields]))
+
+#-----------------------------------------------------------------------------#
+
+class Spawn(Event):
+
+  """
+  A new block appears at the top of the window
+  Parameters: Frame, block type and color
+  """
+
+  __slots__ = ("shape","color")
+  kind = "Spawn"
+  fields = ("frame","shape","color")
+
+  def __init__(self,frame,shape,color):
+    self.frame = frame
+    self.shape = shape
+    self.color = color
+
+#-----------------------------------------------------------------------------#
+
+class Lock(Event):
+
+  """
+  A block lands and its squares are added to the board
+  Parameters: Frame, block type, orientation index, row and column
+  """
+
+  __slots__ = ("shape","rotation","row","col")
+  kind = "Lock"
+  fields = ("frame","shape","rotation","row","col")
+
+  def __init__(self,frame,shape,rotation,row,col):
+    self.frame = frame
+    self.shape = shape
+    self.rotation = rotation
+    self.row = row
+    self.col = col
+
+#-----------------------------------------------------------------------------#
+
+class LineClear(Event):
+
+  """
+  Completed rows are removed
+  Parameters: Frame and list of indices of the rows in order of removal
+  """
+
+  __slots__ = ("rows",)
+  kind = "LineClear"
+  fields = ("frame","rows")
+
+  def __init__(self,frame,rows):
+    self.frame = frame
+    self.rows = rows
+
+#-----------------------------------------------------------------------------#
+
+class LevelUp(Event):
+
+  """
+  The game moves to the next level
+  Parameters: Frame, new level and points
+  """
+
+  __slots__ = ("level","points")
+  kind = "LevelUp"
+  fields = ("frame","level","points")
+
+  def __init__(self,frame,level,points):
+    self.frame = frame
+    self.level = level
+    self.points = points
+
+#-----------------------------------------------------------------------------#
+
+class GameOver(Event):
+
+  """
+  The game ends
+  Parameters: Frame, points and number of cleared rows
+  """
+
+  __slots__ = ("points","lines")
+  kind = "GameOver"
+  fields = ("frame","points","lines")
+
+  def __init__(self,frame,points,lines):
+    self.frame = frame
+    self.points = points
+    self.lines = lines
+
+#-----------------------------------------------------------------------------#
+
+class EventStream(object):
+
+  """
+  A class of EventStream objects that buffers the events of a game and
+  sends them to consumers in batches
+  Parameters: Number of events kept before the buffer is full and whether
+              to drop the oldest events when it is (instead of flushing it)
+  """
+
+  def __init__(self,capacity=CAPACITY,drop=False):
+
+    # set instance variables
+    self.capacity = capacity
+    self.drop = drop
+    self.buffer = deque()  # events not sent to the consumers yet
+    self.consumers = []  # [generator, kinds of events, batch size]
+    self.over = False  # True once the GameOver event has come
+    self.pushed = 0  # number of events pushed
+    self.dropped = 0  # number of events dropped because the buffer was full
+    self.flushes = 0
+
+#-----------------------------------------------------------------------------#
+
+  def __str__(self):
+    """
+    Returns a string of text describing the stream when it is printed
+    """
+
+    s = "Events: %d (%d dropped)" % (self.pushed,self.dropped)
+    s = s + "\nBuffered: %d" % (len(self.buffer))
+    s = s + "\nConsumers: %d" % (len(self.consumers))
+
+    return s
+
+#-----------------------------------------------------------------------------#
+
+  def subscribe(self,consumer,kinds=None,batch=None):
+    """
+    Adds a consumer. The generator is started here and gets lists of
+    events sent to it from then on.
+    Parameters: Generator, tuple of Event classes it wants (all if None)
+                and the largest number of events sent at a time (all the
+                buffered ones if None)
+    Returns: The generator
+    """
+
+    next(consumer)  # run the consumer up to its first yield
+    self.consumers.append([consumer,kinds,batch])
+
+    return consumer
+
+#-----------------------------------------------------------------------------#
+
+  def unsubscribe(self,consumer):
+    """
+    Removes a consumer and closes its generator
+    Parameter: Generator
+    """
+
+    for entry in self.consumers:
+      if entry[0] is consumer:
+        self.consumers.remove(entry)
+        consumer.close()
+        return
+
+#-----------------------------------------------------------------------------#
+
+  def push(self,event):
+    """
+    Adds an event to the buffer. Only the first GameOver event is kept.
+    Parameter: Event object
+    """
+
+    if isinstance(event,GameOver):
+      if self.over:
+        return
+      self.over = True
+    if len(self.buffer) >= self.capacity:
+      if self.drop:
+        self.buffer.popleft()
+        self.dropped += 1
+      else:
+        self.flush()  # the game waits for its consumers
+    self.buffer.append(event)
+    self.pushed += 1
+
+#-----------------------------------------------------------------------------#
+
+  def flush(self):
+    """
+    Sends the buffered events to the consumers. Consumers that return are
+    removed.
+    Returns: Number of events sent
+    """
+
+    buffer = self.buffer
+    if not buffer:
+      return 0
+    events = list(buffer)
+    buffer.clear()
+    self.flushes += 1
+
+    for entry in list(self.consumers):
+      consumer, kinds, batch = entry
+      if kinds == None:
+        wanted = events
+      else:
+        wanted = [event for event in events if isinstance(event,kinds)]
+      size = batch or max(len(wanted),1)
+      try:
+        for k in range(0,len(wanted),size):
+          consumer.send(wanted[k:k+size])
+      except StopIteration:
+        self.consumers.remove(entry)
+
+    return len(events)
+
+#-----------------------------------------------------------------------------#
+
+  def close(self):
+    """
+    Sends the buffered events and closes every consumer
+    """
+
+    self.flush()
+    for consumer, kinds, batch in self.consumers:
+      consumer.close()
+    self.consumers = []
+
+#-----------------------------------------------------------------------------#
+
+def collectEvents(events):
+  """
+  Consumer that appends every event it gets to a list
+  Parameter: List the events are appended to
+  """
+
+  while True:
+    batch = yield
+    events.extend(batch)
+
+#-----------------------------------------------------------------------------#
+
+def countEvents(counts):
+  """
+  Consumer that counts the events of every kind
+  Parameter: Dictionary mapping kinds of events to their numbers
+  """
+
+  while True:
+    batch = yield
+    for event in batch:
+      counts[event.kind] = counts.get(event.kind,0) + 1
+
+#-----------------------------------------------------------------------------#
+
+def writeEvents(write,prefix=""):
+  """
+  Consumer that writes every event as a line of text <see __str__ method of
+  Event class>, with one call of write per batch
+  Parameters: Function that writes a string and text put before every line
+  """
+
+  while True:
+    batch = yield
+    write("".join([prefix + str(event) + "\n" for event in batch]))
+
+#-----------------------------------------------------------------------------#
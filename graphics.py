@@ -161,6 +161,7 @@ __version__ = "5.0"
 #     Added Entry boxes.
 
 import time, os, sys
+from collections import deque, OrderedDict
 
 try:  # import as appropriate for 2.x vs. 3.x
    import tkinter as tk
@@ -179,11 +180,40 @@ OBJ_ALREADY_DRAWN = "Object currently drawn"
 UNSUPPORTED_METHOD = "Object doesn't support operation"
 BAD_OPTION = "Illegal option value"
 
+KEY_BUFFER_SIZE = 64  # number of key presses a GraphWin keeps until drained
+
 ##########################################################################
 # global variables and funtions
 
-_root = tk.Tk()
-_root.withdraw()
+# The Tk root is only created when it is first needed (normally by the
+#   first GraphWin), so that importing this module needs no display.
+_root = None
+
+# Tcl procedure moving canvas items each by its own distance, so that many
+#   items can be moved with a single call into Tk (see GraphWin.moveItems)
+_MOVE_ITEMS = "graphicsMoveItems"
+
+def _getRoot():
+    global _root
+    if _root is None:
+        _root = tk.Tk()
+        _root.withdraw()
+        _root.tk.eval("proc %s {canvas args} "
+                      "{foreach {id x y} $args {$canvas move $id $x $y}}"
+                      % _MOVE_ITEMS)
+        # MacOS fix 1
+        _root.update()
+    return _root
+
+# Optional profiler (see profiler.py). When one is set, draw, undraw, move
+#   and Tk update calls add their time to it.
+_profiler = None
+
+def setProfiler(profiler):
+    """Time draw, undraw, move and update calls with profiler, or stop
+    timing them if profiler is None"""
+    global _profiler
+    _profiler = profiler
 
 _update_lasttime = time.time()
 
@@ -198,7 +228,12 @@ def update(rate=None):
         else:
             _update_lasttime = now
 
-    _root.update()
+    if _profiler:
+        start = _profiler.begin()
+        _getRoot().update()
+        _profiler.end("update", start)
+    else:
+        _getRoot().update()
 
 ############################################################################
 # Graphics classes start here
@@ -210,7 +245,7 @@ class GraphWin(tk.Canvas):
     def __init__(self, title="Graphics Window",
                  width=200, height=200, autoflush=True):
         assert type(title) == type(""), "Title must be a string"
-        master = tk.Toplevel(_root)
+        master = tk.Toplevel(_getRoot())
         master.protocol("WM_DELETE_WINDOW", self.close)
         tk.Canvas.__init__(self, master, width=width, height=height,
                            highlightthickness=0, bd=0)
@@ -218,7 +253,9 @@ class GraphWin(tk.Canvas):
         self.pack()
         master.resizable(0,0)
         self.foreground = "black"
-        self.items = []
+        self.items = OrderedDict() # drawn objects keyed by id(), in the
+                                   #   order they were drawn
+        self.tagged = {}
         self.mouseX = None
         self.mouseY = None
         self.bind("<Button-1>", self._onClick)
@@ -231,7 +268,8 @@ class GraphWin(tk.Canvas):
         self.closed = False
         master.lift()
         self.lastKey = ""
-        if autoflush: _root.update()
+        self.keys = deque(maxlen=KEY_BUFFER_SIZE)
+        if autoflush: update()
 
     def __repr__(self):
         if self.isClosed():
@@ -249,7 +287,22 @@ class GraphWin(tk.Canvas):
             raise GraphicsError("window is closed")
 
     def _onKey(self, evnt):
-        self.lastKey = evnt.keysym
+        self.pushKey(evnt.keysym)
+
+    def update(self):
+        """Process pending Tk events and redraw the window"""
+        if _profiler:
+            start = _profiler.begin()
+            tk.Canvas.update(self)
+            _profiler.end("update", start)
+        else:
+            tk.Canvas.update(self)
+
+    def pushKey(self, key):
+        """Queue a key press as if the user had pressed key. The oldest
+        presses are dropped once KEY_BUFFER_SIZE presses are waiting"""
+        self.lastKey = key
+        self.keys.append((key, time.time()))
 
 
     def setBackground(self, color):
@@ -276,6 +329,12 @@ class GraphWin(tk.Canvas):
     def isClosed(self):
         return self.closed
 
+    def after(self, ms, func=None, *args):
+        """Call func after ms milliseconds from the Tk event loop. The call
+        is scheduled on the root, because Tk drops the pending calls of a
+        window when it is closed, so func can still find it closed"""
+        return _getRoot().after(ms, func, *args)
+
 
     def isOpen(self):
         return not self.closed
@@ -283,7 +342,7 @@ class GraphWin(tk.Canvas):
 
     def __autoflush(self):
         if self.autoflush:
-            _root.update()
+            update()
 
     
     def plot(self, x, y, color="black"):
@@ -344,6 +403,7 @@ class GraphWin(tk.Canvas):
 
         key = self.lastKey
         self.lastKey = ""
+        self.keys.clear()
         return key
 
     def checkKey(self):
@@ -353,7 +413,20 @@ class GraphWin(tk.Canvas):
         self.update()
         key = self.lastKey
         self.lastKey = ""
+        self.keys.clear()
         return key
+
+    def drainKeys(self):
+        """Return list of (key, time) pairs for every key pressed since
+        the last call, oldest first, and empty the queue. Unlike checkKey
+        it processes no Tk events: it is meant to be called from the Tk
+        event loop, which queues the keys itself (see pushKey)"""
+        if self.isClosed():
+            raise GraphicsError("drainKeys in closed window")
+        keys = list(self.keys)
+        self.keys.clear()
+        self.lastKey = ""
+        return keys
             
     def getHeight(self):
         """Return the height of the window"""
@@ -387,17 +460,114 @@ class GraphWin(tk.Canvas):
             self._mouseCallback(Point(e.x, e.y))
 
     def addItem(self, item):
-        self.items.append(item)
+        self.items[id(item)] = item
 
     def delItem(self, item):
-        self.items.remove(item)
+        del self.items[id(item)]
+
+    def getItems(self):
+        """Return list of drawn objects in the order they were drawn"""
+        return list(self.items.values())
 
     def redraw(self):
-        for item in self.items[:]:
+        for item in self.getItems():
             item.undraw()
             item.draw(self)
         self.update()
-        
+
+    def addTag(self, tag, *items):
+        """Add tag to drawn GraphicsObjects. All objects sharing a tag
+        can then be moved with a single Tk call (see moveTag)"""
+        self.__checkOpen()
+        for item in items:
+            self.addtag_withtag(tag, item.id)
+        self.tagged.setdefault(tag, []).extend(items)
+
+    def dropTag(self, tag):
+        """Remove tag from every object carrying it"""
+        if tag in self.tagged:
+            del self.tagged[tag]
+            if not self.closed:
+                self.dtag(tag)
+
+    def moveTag(self, tag, dx, dy):
+        """Move every object carrying tag dx units in x direction and dy
+        units in y direction with a single Tk call. tag may also be a
+        list of tags, objects carrying any of them are moved."""
+        self.__checkOpen()
+        if isinstance(tag, (list, tuple)):
+            tags = tag
+            tag = "||".join(tags)  # Tk tag expression
+        else:
+            tags = [tag]
+        for name in tags:
+            for item in self.tagged.get(name, []):
+                item._move(dx, dy)
+        trans = self.trans
+        if trans:
+            x = dx / trans.xscale
+            y = -dy / trans.yscale
+        else:
+            x = dx
+            y = dy
+        if _profiler: start = _profiler.begin()
+        self.move(tag, x, y)
+        self.__autoflush()
+        if _profiler: _profiler.end("move", start)
+
+    def moveItems(self, moves):
+        """Move several drawn objects, each by its own distance, with a
+        single Tk call. moves is a list of (object, dx, dy)"""
+        self.__checkOpen()
+        if not moves:
+            return
+        trans = self.trans
+        args = []
+        for item, dx, dy in moves:
+            item._move(dx, dy)
+            if trans:
+                args += (item.id, dx / trans.xscale, -dy / trans.yscale)
+            else:
+                args += (item.id, dx, dy)
+        if _profiler: start = _profiler.begin()
+        self._moveItems(*args)
+        self.__autoflush()
+        if _profiler: _profiler.end("move", start)
+
+    def _moveItems(self, *args):
+        # Internal method moving canvas items with one call to the Tcl
+        #    procedure made by _getRoot. args are id, dx, dy triples
+        self.tk.call(_MOVE_ITEMS, self._w, *args)
+
+    def configTag(self, tag, **options):
+        """Set options (e.g. fill="grey") of every object carrying tag
+        with a single Tk call"""
+        self.__checkOpen()
+        for item in self.tagged.get(tag, []):
+            for option in options:
+                if option not in item.config:
+                    raise GraphicsError(UNSUPPORTED_METHOD)
+                item.config[option] = options[option]
+        if _profiler: start = _profiler.begin()
+        self.itemconfig(tag, options)
+        self.__autoflush()
+        if _profiler: _profiler.end("draw", start)
+
+    def deleteTag(self, tag):
+        """Undraw every object carrying tag with a single Tk call and
+        remove the tag"""
+        items = self.tagged.pop(tag, [])
+        if _profiler: start = _profiler.begin()
+        for item in items:
+            if item.canvas is self:
+                self.delItem(item)
+                item.canvas = None
+                item.id = None
+        if not self.closed:
+            self.delete(tag)
+            self.__autoflush()
+        if _profiler: _profiler.end("undraw", start)
+
                       
 class Transform:
 
@@ -437,11 +607,15 @@ DEFAULT_CONFIG = {"fill":"",
       "justify":"center",
                   "font": ("helvetica", 12, "normal")}
 
-class GraphicsObject:
+class GraphicsObject(object):
 
     """Generic base class for all of the drawable objects"""
     # A subclass of GraphicsObject should override _draw and
     #   and _move methods.
+
+    # Point and Rectangle are created in large numbers, so they declare
+    #   __slots__ and have no per-instance __dict__. Other subclasses do.
+    __slots__ = ("canvas", "id", "config")
     
     def __init__(self, options):
         # options is a list of strings indicating which options are
@@ -480,11 +654,13 @@ class GraphicsObject:
 
         if self.canvas and not self.canvas.isClosed(): raise GraphicsError(OBJ_ALREADY_DRAWN)
         if graphwin.isClosed(): raise GraphicsError("Can't draw to closed window")
+        if _profiler: start = _profiler.begin()
         self.canvas = graphwin
         self.id = self._draw(graphwin, self.config)
         graphwin.addItem(self)
         if graphwin.autoflush:
-            _root.update()
+            update()
+        if _profiler: _profiler.end("draw", start)
         return self
 
             
@@ -494,13 +670,15 @@ class GraphicsObject:
         object is not currently drawn."""
         
         if not self.canvas: return
+        if _profiler: start = _profiler.begin()
         if not self.canvas.isClosed():
             self.canvas.delete(self.id)
             self.canvas.delItem(self)
             if self.canvas.autoflush:
-                _root.update()
+                update()
         self.canvas = None
         self.id = None
+        if _profiler: _profiler.end("undraw", start)
 
 
     def move(self, dx, dy):
@@ -508,6 +686,7 @@ class GraphicsObject:
         """move object dx units in x direction and dy units in y
         direction"""
         
+        if _profiler: start = _profiler.begin()
         self._move(dx,dy)
         canvas = self.canvas
         if canvas and not canvas.isClosed():
@@ -520,7 +699,8 @@ class GraphicsObject:
                 y = dy
             self.canvas.move(self.id, x, y)
             if canvas.autoflush:
-                _root.update()
+                update()
+        if _profiler: _profiler.end("move", start)
            
     def _reconfig(self, option, setting):
         # Internal method for changing configuration of the object
@@ -533,7 +713,7 @@ class GraphicsObject:
         if self.canvas and not self.canvas.isClosed():
             self.canvas.itemconfig(self.id, options)
             if self.canvas.autoflush:
-                _root.update()
+                update()
 
 
     def _draw(self, canvas, options):
@@ -548,14 +728,39 @@ class GraphicsObject:
 
          
 class Point(GraphicsObject):
+
+    __slots__ = ("x", "y")
+
     def __init__(self, x, y):
-        GraphicsObject.__init__(self, ["outline", "fill"])
-        self.setFill = self.setOutline
+        # most points only hold coordinates (e.g. corners of a Rectangle)
+        #   and are never drawn, so their config dictionary is only made
+        #   when it is first needed (see _options)
+        self.canvas = None
+        self.id = None
+        self.config = None
         self.x = float(x)
         self.y = float(y)
 
     def __repr__(self):
         return "Point({}, {})".format(self.x, self.y)
+
+    def _options(self):
+        if self.config is None:
+            self.config = {"outline": DEFAULT_CONFIG["outline"],
+                           "fill": DEFAULT_CONFIG["fill"]}
+        return self.config
+
+    def setFill(self, color):
+        """Set color of the point"""
+        self.setOutline(color)
+
+    def draw(self, graphwin):
+        self._options()
+        return GraphicsObject.draw(self, graphwin)
+
+    def _reconfig(self, option, setting):
+        self._options()
+        GraphicsObject._reconfig(self, option, setting)
         
     def _draw(self, canvas, options):
         x,y = canvas.toScreen(self.x,self.y)
@@ -567,7 +772,8 @@ class Point(GraphicsObject):
         
     def clone(self):
         other = Point(self.x,self.y)
-        other.config = self.config.copy()
+        if self.config is not None:
+            other.config = self.config.copy()
         return other
                 
     def getX(self): return self.x
@@ -576,6 +782,8 @@ class Point(GraphicsObject):
 class _BBox(GraphicsObject):
     # Internal base class for objects represented by bounding box
     # (opposite corners) Line segment is a degenerate case.
+
+    __slots__ = ("p1", "p2")
     
     def __init__(self, p1, p2, options=["outline","width","fill"]):
         GraphicsObject.__init__(self, options)
@@ -591,7 +799,7 @@ class _BBox(GraphicsObject):
     def getP1(self): return self.p1.clone()
 
     def getP2(self): return self.p2.clone()
-    
+
     def getCenter(self):
         p1 = self.p1
         p2 = self.p2
@@ -599,6 +807,8 @@ class _BBox(GraphicsObject):
 
     
 class Rectangle(_BBox):
+
+    __slots__ = ()
     
     def __init__(self, p1, p2):
         _BBox.__init__(self, p1, p2)
@@ -787,7 +997,7 @@ class Entry(GraphicsObject):
         self.anchor = p.clone()
         #print self.anchor
         self.width = width
-        self.text = tk.StringVar(_root)
+        self.text = tk.StringVar(_getRoot())
         self.text.set("")
         self.fill = "gray"
         self.color = "black"
@@ -882,10 +1092,11 @@ class Image(GraphicsObject):
         self.imageId = Image.idCount
         Image.idCount = Image.idCount + 1
         if len(pixmap) == 1: # file name provided
-            self.img = tk.PhotoImage(file=pixmap[0], master=_root)
+            self.img = tk.PhotoImage(file=pixmap[0], master=_getRoot())
         else: # width and height provided
             width, height = pixmap
-            self.img = tk.PhotoImage(master=_root, width=width, height=height)
+            self.img = tk.PhotoImage(master=_getRoot(), width=width,
+                                     height=height)
 
     def __repr__(self):
         return "Image({}, {}, {})".format(self.anchor, self.getWidth(), self.getHeight())
@@ -1008,8 +1219,7 @@ def test():
 #MacOS fix 2
 #tk.Toplevel(_root).destroy()
 
-# MacOS fix 1
-update()
+# MacOS fix 1 is done when the Tk root is created (see _getRoot)
 
 if __name__ == "__main__":
     test()
\ No newline at end of file
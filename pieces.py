@@ -0,0 +1,140 @@
+"""
+The program builds a table with every orientation of each TETRIS block type.
+Every orientation is stored as a list of bit masks, one per row of the
+block, so that checking if a block fits on a board <see Board class> only
+takes one bitwise AND per row. <see Piece class> for usage.
+"""
+
+# Layout of every block type on the top two rows of the window, drawn over
+# the four columns in the middle of the window ('#' marks a square)
+SHAPES = {"flat":   ["....",
+                     "####"],
+          "box":    [".##.",
+                     ".##."],
+          "rightz": [".##.",
+                     "..##"],
+          "leftz":  [".##.",
+                     "##.."],
+          "rightl": [".#..",
+                     ".###"],
+          "leftl":  ["..#.",
+                     "###."],
+          "tee":    [".#..",
+                     "###."]}
+
+BLOCK_TYPES = ["flat","box","rightz","leftz","rightl","leftl","tee"]
+
+class Rotation(object):
+
+  """
+  A class of Rotation objects that describes one orientation of a block.
+  Cells are given as [row,column] offsets from the lowest row and the
+  leftmost column of the block, with rows counted upwards.
+  Parameter: List of [row,column] offsets of the squares of the block
+  """
+
+  def __init__(self,cells):
+
+    # set instance variables
+    self.cells = cells
+    self.width = max([col for row, col in cells]) + 1
+    self.height = max([row for row, col in cells]) + 1
+
+    # bit c of masks[r] is set when the block has a square at offset [r,c]
+    masks = [0]*self.height
+    for row, col in cells:
+      masks[row] |= 1 << col
+    self.masks = tuple(masks)
+
+#-----------------------------------------------------------------------------#
+
+  def __eq__(self,other):
+    return self.masks == other.masks
+
+#-----------------------------------------------------------------------------#
+
+  def __ne__(self,other):
+    return not self == other
+
+#-----------------------------------------------------------------------------#
+
+  def spun(self):
+    """
+    Returns the Rotation of the block after spinning it over an angle of -90
+    degrees
+    """
+
+    cells = []
+    for row, col in self.cells:
+      # the leftmost column becomes the top row and the lowest row becomes
+      # the leftmost column
+      cells.append([self.width-1-col,row])
+
+    return Rotation(cells)
+
+#-----------------------------------------------------------------------------#
+
+def buildRotations(layout):
+  """
+  Returns a list with every distinct orientation of a block, in the order
+  they are reached by spinning it, starting with the orientation of the
+  given layout
+  """
+
+  cells = []
+  for i in range(len(layout)):
+    for j in range(len(layout[i])):
+      if layout[i][j] == "#":
+        cells.append([len(layout)-1-i,j])
+
+  # move block so that its leftmost square is on column 0
+  left = min([col for row, col in cells])
+  for cell in cells:
+    cell[1] -= left
+
+  rotations = [Rotation(cells)]
+  spun = rotations[-1].spun()
+  while spun != rotations[0]:
+    rotations.append(spun)
+    spun = spun.spun()
+
+  return rotations
+
+#-----------------------------------------------------------------------------#
+
+def spawnColumn(layout):
+  """
+  Returns the offset of the leftmost square of a block from the first
+  column of its layout
+  """
+
+  offsets = []
+  for line in layout:
+    if "#" in line:
+      offsets.append(line.index("#"))
+
+  return min(offsets)
+
+#-----------------------------------------------------------------------------#
+
+def spawnRows(layout):
+  """
+  Returns the number of rows from the top of the window down to the lowest
+  square of a block in its layout
+  """
+
+  rows = len(layout)
+  while "#" not in layout[rows-1]:
+    rows -= 1
+
+  return rows
+
+#-----------------------------------------------------------------------------#
+
+# block type -> list of its Rotation objects
+ROTATIONS = dict((shape,buildRotations(SHAPES[shape])) for shape in BLOCK_TYPES)
+# block type -> column offset of its leftmost square
+SPAWN_COLUMNS = dict((shape,spawnColumn(SHAPES[shape])) \
+                     for shape in BLOCK_TYPES)
+# block type -> number of rows from the top of the window to its lowest row
+SPAWN_ROWS = dict((shape,spawnRows(SHAPES[shape])) for shape in BLOCK_TYPES)
@@ -0,0 +1,182 @@
+"""
+The program defines a Profiler class that measures where the time of a
+TETRIS game goes. Phases of a frame (keys, collision checks, completed rows,
+drawing, Tk updates, waiting for the next frame and so on) add up their wall
+time and number of calls, and the time and number of Tk updates of the last
+frames are kept to give rolling 50th and 99th percentiles. A profiler is
+only used when one is given to a Tetris object <see Tetris class>; it is
+hooked into graphics.py with setProfiler.
+"""
+
+from collections import deque
+import json
+import time
+
+from stats import percentile
+
+WINDOW = 600  # number of frames the rolling statistics are taken over
+                # (10 seconds at 60 frames per second)
+
+clock = getattr(time,"perf_counter",time.time)
+
+class Profiler(object):
+
+  """
+  A class of Profiler objects that records the time spent in every phase of
+  the frames of a game
+  Parameters: Number of frames the rolling statistics are taken over and
+              optionally the name of the file the results are written to at
+              the end of the game <see dump method>
+  """
+
+  def __init__(self,window=WINDOW,fileName=None):
+
+    # set instance variables
+    self.clock = clock
+    self.fileName = fileName
+    self.phases = {}  # phase name -> [seconds, number of calls]
+    self.frameTimes = deque(maxlen=window)  # seconds of the last frames
+    self.frameUpdates = deque(maxlen=window)  # Tk updates of the last frames
+    self.frames = 0  # number of frames measured
+    self.updates = 0  # number of Tk updates in the current frame
+    self.frameStart = None
+
+#-----------------------------------------------------------------------------#
+
+  def __str__(self):
+    """
+    Returns a string of text describing the measurements when it is printed
+    """
+
+    s = self.overlay()
+    for name in sorted(self.phases):
+      seconds, calls = self.phases[name]
+      s = s + "\n%s: %.3f s in %d calls" % (name,seconds,calls)
+
+    return s
+
+#-----------------------------------------------------------------------------#
+
+  def begin(self):
+    """
+    Returns the current time, to be given to end when a phase is over
+    """
+
+    return clock()
+
+#-----------------------------------------------------------------------------#
+
+  def end(self,name,start):
+    """
+    Adds the time since start to a phase
+    Parameters: Name of the phase and time returned by begin
+    """
+
+    self.add(name,clock()-start)
+
+#-----------------------------------------------------------------------------#
+
+  def add(self,name,seconds):
+    """
+    Adds time and one call to a phase
+    Parameters: Name of the phase and number of seconds
+    """
+
+    phase = self.phases.get(name)
+    if phase == None:
+      phase = self.phases[name] = [0.0,0]
+    phase[0] += seconds
+    phase[1] += 1
+    if name == "update":
+      self.updates += 1
+
+#-----------------------------------------------------------------------------#
+
+  def startFrame(self):
+    """
+    Marks the start of a frame
+    """
+
+    self.updates = 0
+    self.frameStart = clock()
+
+#-----------------------------------------------------------------------------#
+
+  def endFrame(self):
+    """
+    Marks the end of a frame and keeps its time and number of Tk updates
+    """
+
+    seconds = clock() - self.frameStart
+    self.add("frame",seconds)
+    self.frameTimes.append(seconds)
+    self.frameUpdates.append(self.updates)
+    self.frames += 1
+
+#-----------------------------------------------------------------------------#
+
+  def percentile(self,p):
+    """
+    Returns the p-th percentile of the times of the last frames in seconds
+    (None before the first frame)
+    """
+
+    return percentile(sorted(self.frameTimes),p)
+
+#-----------------------------------------------------------------------------#
+
+  def summary(self):
+    """
+    Returns a dictionary with the rolling frame time percentiles and Tk
+    updates per frame, and the total seconds, calls and mean milliseconds
+    per call of every phase
+    """
+
+    updates = self.frameUpdates
+    phases = {}
+    for name in self.phases:
+      seconds, calls = self.phases[name]
+      phases[name] = {"seconds": seconds, "calls": calls,
+                      "meanMs": 1000*seconds/max(calls,1)}
+
+    summary = {"frames": self.frames, "window": len(self.frameTimes),
+               "p50Ms": 1000*(self.percentile(50) or 0),
+               "p99Ms": 1000*(self.percentile(99) or 0),
+               "updatesPerFrame": sum(updates)/float(max(len(updates),1)),
+               "phases": phases}
+    return summary
+
+#-----------------------------------------------------------------------------#
+
+  def overlay(self):
+    """
+    Returns a short text with the rolling statistics to show on the window
+    """
+
+    summary = self.summary()
+    s = "frame p50 %.2f ms" % (summary["p50Ms"])
+    s = s + "\nframe p99 %.2f ms" % (summary["p99Ms"])
+    s = s + "\nTk updates/frame %.1f" % (summary["updatesPerFrame"])
+
+    return s
+
+#-----------------------------------------------------------------------------#
+
+  def dump(self,fileName=None):
+    """
+    Writes the summary to a JSON file
+    Parameter: Name of the file (self.fileName if None, nothing is written
+               if both are None)
+    """
+
+    if fileName == None:
+      fileName = self.fileName
+    if fileName == None:
+      return
+    dumpFile = open(fileName,"w")
+    try:
+      json.dump(self.summary(),dumpFile,indent=2,sort_keys=True)
+    finally:
+      dumpFile.close()
+
+#-----------------------------------------------------------------------------#
@@ -0,0 +1,225 @@
+"""
+The program defines randomizers that decide the order in which TETRIS block
+types appear. Every randomizer is seeded and makes its blocks in batches
+that are kept in a queue, so the upcoming blocks can be looked at <see peek
+method> or taken many at a time without calling into the random module for
+every new block.
+
+uniform: every block type is equally likely every time
+bag:     the seven block types are shuffled like a bag of seven tiles and
+         dealt out before a new bag is shuffled, so no type waits more
+         than 12 blocks
+history: a type is drawn again (up to 4 times) while it is one of the last
+         4 types dealt out
+
+<see Engine class> for usage.
+"""
+
+from collections import deque
+from numbers import Integral
+from random import *
+from pieces import *
+
+BATCH_SIZE = 64  # number of blocks made at a time by the uniform and history
+                 # randomizers
+SEED_RANGE = 2**64  # seeds are kept in 8 bytes by replays and snapshots
+
+#-----------------------------------------------------------------------------#
+
+def checkSeed(seed):
+  """
+  Returns a seed as a number from 0 to SEED_RANGE-1 (negative and larger
+  seeds wrap around), so every seed a game is built with can be saved in a
+  replay or snapshot <see replay.py and snapshot.py>
+  Parameter: Integer seed, or None for a seed picked by the random module
+  """
+
+  if seed == None:
+    return None
+  if isinstance(seed,bool) or not isinstance(seed,Integral):
+    raise ValueError("seed must be an integer, not %r" % (seed,))
+
+  return int(seed) % SEED_RANGE
+
+#-----------------------------------------------------------------------------#
+
+class Randomizer(object):
+
+  """
+  A class of Randomizer objects that deals out block types. This class draws
+  every block type with the same probability; subclasses change the way a
+  batch of blocks is made <see generate method>.
+  Parameters: Seed of the random choices and the list of block types
+  """
+
+  name = "uniform"
+
+  def __init__(self,seed=None,shapes=BLOCK_TYPES):
+
+    # set instance variables
+    self.seed = checkSeed(seed)
+    self.random = Random(self.seed)
+    self.shapes = list(shapes)
+    self.queue = deque()  # block types made but not dealt out yet
+    self.count = 0  # number of block types dealt out
+
+#-----------------------------------------------------------------------------#
+
+  def __str__(self):
+    """
+    Returns a string of text describing the randomizer when it is printed
+    """
+
+    s = "Randomizer: %s" % (self.name)
+    s = s + "\nSeed: %s" % (self.seed)
+    s = s + "\nNext: %s" % (", ".join(self.peek(5)))
+
+    return s
+
+#-----------------------------------------------------------------------------#
+
+  def generate(self):
+    """
+    Returns a list with the next batch of block types
+    """
+
+    choose = self.random.choice
+    shapes = self.shapes
+    return [choose(shapes) for k in range(BATCH_SIZE)]
+
+#-----------------------------------------------------------------------------#
+
+  def fill(self,n):
+    """
+    Makes batches of block types until at least n of them are queued
+    Parameter: Number of block types needed
+    """
+
+    while len(self.queue) < n:
+      self.queue.extend(self.generate())
+
+#-----------------------------------------------------------------------------#
+
+  def peek(self,n=1):
+    """
+    Returns a list of the next n block types without dealing them out
+    Parameter: Number of block types
+    """
+
+    self.fill(n)
+    queue = self.queue
+    return [queue[k] for k in range(n)]
+
+#-----------------------------------------------------------------------------#
+
+  def take(self,n):
+    """
+    Deals out the next n block types
+    Parameter: Number of block types
+    Returns: List of block types
+    """
+
+    self.fill(n)
+    popleft = self.queue.popleft
+    self.count += n
+    return [popleft() for k in range(n)]
+
+#-----------------------------------------------------------------------------#
+
+  def next(self):
+    """
+    Deals out the next block type
+    """
+
+    if not self.queue:
+      self.fill(1)
+    self.count += 1
+    return self.queue.popleft()
+
+  __next__ = next
+
+  def __iter__(self):
+    return self
+
+#-----------------------------------------------------------------------------#
+
+class BagRandomizer(Randomizer):
+
+  """
+  A class of Randomizer objects that deals out every block type once, in a
+  random order, before any of them is dealt out again
+  Parameters: Seed of the random choices and the list of block types
+  """
+
+  name = "bag"
+
+  def generate(self):
+    """
+    Returns a shuffled list of all block types
+    """
+
+    bag = list(self.shapes)
+    self.random.shuffle(bag)
+    return bag
+
+#-----------------------------------------------------------------------------#
+
+class HistoryRandomizer(Randomizer):
+
+  """
+  A class of Randomizer objects that tries not to repeat any of the last few
+  block types it dealt out
+  Parameters: Seed of the random choices, the list of block types, the
+              number of block types remembered and the number of draws
+  """
+
+  name = "history"
+
+  def __init__(self,seed=None,shapes=BLOCK_TYPES,size=4,tries=4):
+
+    Randomizer.__init__(self,seed,shapes)
+    self.history = deque(maxlen=size)  # last block types made
+    self.tries = tries
+
+#-----------------------------------------------------------------------------#
+
+  def generate(self):
+    """
+    Returns a list with the next batch of block types. Every block type is
+    drawn again while it is in the history, up to self.tries draws.
+    """
+
+    choose = self.random.choice
+    shapes = self.shapes
+    history = self.history
+    batch = []
+    for k in range(BATCH_SIZE):
+      for t in range(self.tries):
+        shape = choose(shapes)
+        if shape not in history:
+          break
+      history.append(shape)
+      batch.append(shape)
+
+    return batch
+
+#-----------------------------------------------------------------------------#
+
+RANDOMIZERS = {"uniform": Randomizer, "bag": BagRandomizer,
+               "history": HistoryRandomizer}
+RANDOMIZER_NAMES = ["uniform","bag","history"]  # codes used by replay.py
+
+#-----------------------------------------------------------------------------#
+
+def makeRandomizer(name,seed=None,shapes=BLOCK_TYPES):
+  """
+  Returns a new randomizer
+  Parameters: Name of the randomizer ("uniform", "bag" or "history"), seed
+              and list of block types
+  """
+
+  if name not in RANDOMIZERS:
+    raise ValueError("unknown randomizer: %s" % (name))
+  return RANDOMIZERS[name](seed,shapes)
+
+#-----------------------------------------------------------------------------#
@@ -0,0 +1,112 @@
+"""
+The program defines a Renderer class that draws a TETRIS board with one
+square per cell of the window. All the squares are drawn once, when the
+renderer is created, and empty cells are squares without fill or outline.
+Every frame the colors the cells should have are compared with the colors
+they had in the last frame and only the cells that changed are reconfigured,
+with one itemconfig call each. Nothing is ever moved, created or deleted.
+<see Tetris class> for usage.
+"""
+
+from graphics import *
+
+OUTLINE = "black"  # outline of the square of an occupied cell
+
+class Renderer(object):
+
+  """
+  A class of Renderer objects that keeps a square for every cell of a board
+  Parameters: Window, number of rows and number of columns of the board
+  """
+
+  def __init__(self,win,rows=25,cols=10):
+
+    # set instance variables
+    self.win = win
+    self.numRows = rows
+    self.numCols = cols
+    size = win.getWidth()/float(cols)  # length of side of a cell
+    self.shown = [[None]*cols for row in range(rows)] # color every cell has
+                                                      # on the window
+    self.changes = 0  # number of cells reconfigured so far
+
+    # create and draw a square for every cell, squares[row][col] is the
+    # square of the cell in row row (counting upwards) and column col
+    self.squares = []
+    for row in range(rows):
+      line = []
+      top = (rows-1-row)*size
+      for col in range(cols):
+        square = Rectangle(Point(col*size,top),Point((col+1)*size,top+size))
+        square.setFill("")  # empty cells are not seen
+        square.setOutline("")
+        square.draw(win)
+        line.append(square)
+      self.squares.append(line)
+
+#-----------------------------------------------------------------------------#
+
+  def __str__(self):
+    """
+    Returns a string of text describing the renderer when it is printed
+    """
+
+    s = "Cells: %d x %d" % (self.numRows,self.numCols)
+    s = s + "\nChanged cells: %d" % (self.changes)
+
+    return s
+
+#-----------------------------------------------------------------------------#
+
+  def paint(self,row,col,color):
+    """
+    Changes the color of a cell on the window
+    Parameters: Row and column of the cell and its color (None to empty it)
+    """
+
+    square = self.squares[row][col]
+    if color == None:
+      fill = outline = ""
+    else:
+      fill = color
+      outline = OUTLINE
+    square.config["fill"] = fill  # keep the options of the square up to date
+    square.config["outline"] = outline
+    self.win.itemconfig(square.id,fill=fill,outline=outline)
+    self.shown[row][col] = color
+    self.changes += 1
+
+#-----------------------------------------------------------------------------#
+
+  def render(self,colors,cells=[],color=None):
+    """
+    Brings the window up to date with a board and a falling block. Rows that
+    did not change are skipped with one comparison each.
+    Parameters: List of rows of the colors of the cells of the board (None
+                for empty cells) <see Board class>, list of [row,column]
+                cells of the falling block and its color
+    Returns: Number of cells that changed
+    """
+
+    # colors every row should have: the rows covered by the block are
+    # copied before the block is added to them
+    wanted = list(colors[:self.numRows])
+    for row, col in cells:
+      if 0 <= row < self.numRows:
+        if wanted[row] is colors[row]:
+          wanted[row] = list(colors[row])
+        wanted[row][col] = color
+
+    changes = self.changes
+    shown = self.shown
+    for row in range(self.numRows):
+      line = wanted[row]
+      if line != shown[row]:
+        old = shown[row]
+        for col in range(self.numCols):
+          if line[col] != old[col]:
+            self.paint(row,col,line[col])
+
+    return self.changes - changes
+
+#-----------------------------------------------------------------------------#
@@ -0,0 +1,177 @@
+"""
+The program records TETRIS games in a compact binary replay format and plays
+them back without graphics. A game is fully decided by the seed of its
+Engine <see Engine class> and the keys pressed on every frame of the game
+clock, so a replay only stores those: a header with the seed and randomizer
+(and the final frame count, score and Zobrist hash of the board to check the
+playback against) followed by one 5 byte record (frame, key) per key press.
+Playback runs the Engine frame by frame as fast as it can.
+
+To run: python replay.py file [file ...]
+"""
+
+import struct
+import sys
+import time
+
+from engine import *
+
+MAGIC = b"TTRS"
+VERSION = 4
+# magic, version, rows, columns, randomizer code <see RANDOMIZER_NAMES in
+# randomizer.py>, seed, number of frames, points, hash of the final board
+HEADER = struct.Struct("<4sBBBBQIIQ")
+# frame of the game clock <see tick method of Engine class>, key code
+EVENT = struct.Struct("<IB")
+KEY_CODES = {"Left": 0, "Right": 1, "Down": 2, "Up": 3}
+KEY_NAMES = ["Left","Right","Down","Up"]
+
+class Recorder(object):
+
+  """
+  A class of Recorder objects that keeps the keys pressed in a game
+  Parameters: Seed of the game, the number of rows and columns of the
+              window and the name of the randomizer of the game
+  """
+
+  def __init__(self,seed,rows=25,cols=10,randomizer="uniform"):
+
+    # set instance variables
+    self.seed = seed
+    self.numRows = rows
+    self.numCols = cols
+    self.randomizer = randomizer
+    self.events = bytearray()  # packed (frame, key) records
+    self.count = 0  # number of recorded key presses
+
+#-----------------------------------------------------------------------------#
+
+  def record(self,frame,key):
+    """
+    Records a key press. Keys that do not move a block are left out.
+    Parameters: Frame of the game clock the key is applied on (the number of
+                frames the clock has run before it) and name of the key
+    """
+
+    if key in KEY_CODES:
+      self.events.extend(EVENT.pack(frame,KEY_CODES[key]))
+      self.count += 1
+
+#-----------------------------------------------------------------------------#
+
+  def dump(self,frames,points,hash):
+    """
+    Returns the replay as a string of bytes
+    Parameters: Number of frames the game ran, the final score and the
+                Zobrist hash of the final board <see Board class>
+    """
+
+    code = RANDOMIZER_NAMES.index(self.randomizer)
+    header = HEADER.pack(MAGIC,VERSION,self.numRows,self.numCols,code,
+                         self.seed,frames,points,hash)
+    return header + bytes(self.events)
+
+#-----------------------------------------------------------------------------#
+
+  def save(self,fileName,frames,points,hash):
+    """
+    Writes the replay to a file
+    Parameters: Name of the file, number of frames the game ran, the final
+                score and the hash of the final board
+    """
+
+    replayFile = open(fileName,"wb")
+    try:
+      replayFile.write(self.dump(frames,points,hash))
+    finally:
+      replayFile.close()
+
+#-----------------------------------------------------------------------------#
+
+def load(data):
+  """
+  Reads a replay
+  Parameter: String of bytes of a replay
+  Returns: Dictionary with the "seed", "rows", "cols", "randomizer",
+           "frames", "points" and "hash" of the header and the list of
+           (frame, key name) "events"
+  """
+
+  if len(data) < HEADER.size:
+    raise ValueError("replay is too short")
+  header = HEADER.unpack_from(data)
+  magic, version, rows, cols, code, seed, frames, points, hash = header
+  if magic != MAGIC or version != VERSION:
+    raise ValueError("not a replay file of version %d" % (VERSION))
+  if (len(data) - HEADER.size) % EVENT.size != 0:
+    raise ValueError("replay is truncated")
+
+  events = []
+  for offset in range(HEADER.size,len(data),EVENT.size):
+    frame, key = EVENT.unpack_from(data,offset)
+    if key >= len(KEY_NAMES):
+      raise ValueError("unknown key code %d at byte %d" % (key,offset))
+    events.append((frame,KEY_NAMES[key]))
+
+  replay = {"seed": seed, "rows": rows, "cols": cols,
+            "randomizer": RANDOMIZER_NAMES[code], "frames": frames,
+            "points": points, "hash": hash, "events": events}
+  return replay
+
+#-----------------------------------------------------------------------------#
+
+def play(data,**options):
+  """
+  Plays a replay back without graphics. Keys recorded on a frame are pressed
+  before the game clock runs that frame, just like Tetris.tick checks the
+  keyboard before it moves the clock of its Engine on.
+  Parameters: String of bytes of a replay and extra Engine parameters
+  Returns: Engine object of the game at the end of the replay
+  """
+
+  replay = load(data)
+  engine = Engine(replay["rows"],replay["cols"],replay["seed"],
+                  randomizer=replay["randomizer"],**options)
+  engine.spawn()  # the first block appears before the clock starts
+  events = replay["events"]
+  k = 0
+  while engine.frames < replay["frames"] and not engine.isOver():
+    while k < len(events) and events[k][0] <= engine.frames:
+      engine.press(events[k][1])
+      k += 1
+    engine.frame()
+
+  return engine
+
+#-----------------------------------------------------------------------------#
+
+def main():
+  """
+  Plays back the replay files given on the command line and prints how fast
+  they ran and whether they ended with the recorded score and board
+  """
+
+  for fileName in sys.argv[1:]:
+    replayFile = open(fileName,"rb")
+    try:
+      data = replayFile.read()
+    finally:
+      replayFile.close()
+    replay = load(data)
+
+    start = time.time()
+    engine = play(data)
+    elapsed = max(time.time() - start,1e-9)
+
+    speed = engine.frames/float(engine.frameRate)/elapsed
+    if engine.points == replay["points"] and \
+       engine.board.hash == replay["hash"]:
+      match = "matches"
+    else:
+      match = "DIFFERS"
+    print("%s: seed %d, %d keys, %d frames, %d points (%s), %.0fx real time"
+          % (fileName,replay["seed"],len(replay["events"]),engine.frames,
+             engine.points,match,speed))
+
+#-----------------------------------------------------------------------------#
+if __name__ == "__main__": main()
@@ -0,0 +1,234 @@
+"""
+The program plays many seeded TETRIS games without any graphics <see Engine
+class> over a pool of processes and sums up the distribution of the score,
+level, cleared rows and length of the games. A policy decides which keys are
+pressed for every block, so the same games can be played by different
+players to tune the difficulty of the game.
+
+Games can be appended to an archive <see Archive class>.
+
+To run: python simulate.py [games] [--processes N] ... [--archive FILE]
+"""
+
+from multiprocessing import Pool
+import argparse
+import json
+import time
+
+from engine import *
+from ai import Player
+from archive import Archive
+from stats import percentile
+
+KEYS = ["Left","Right","Up","Down"]
+
+#-----------------------------------------------------------------------------#
+
+def randomPolicy(engine):
+  """
+  Policy that spins a new block a random number of times and moves it a
+  random number of columns to one side
+  Parameter: Engine object of the game
+  Returns: List of keys to press, one per step of gravity
+  """
+
+  rand = engine.random  # keeps games with the same seed identical
+  keys = ["Up"]*rand.randint(0,3)
+  keys = keys + [rand.choice(["Left","Right"])]*rand.randint(0,5)
+
+  return keys
+
+#-----------------------------------------------------------------------------#
+
+def idlePolicy(engine):
+  """
+  Policy that never presses any key
+  Parameter: Engine object of the game
+  Returns: Empty list of keys
+  """
+
+  return []
+
+#-----------------------------------------------------------------------------#
+
+_player = None  # Player object of the process <see aiPolicy>
+
+def aiPolicy(engine):
+  """
+  Policy that spins and moves every block to the placement chosen by a
+  Player object <see Player class>
+  Parameter: Engine object of the game
+  Returns: List of keys to press
+  """
+
+  global _player
+  if _player == None:
+    _player = Player()
+  return _player.keys(engine,drop=False)
+
+#-----------------------------------------------------------------------------#
+
+POLICIES = {"random": randomPolicy, "idle": idlePolicy, "ai": aiPolicy}
+
+#-----------------------------------------------------------------------------#
+
+def playGame(seed,policy=randomPolicy,maxSteps=100000,options={},
+             record=False):
+  """
+  Plays one game without graphics. The policy is asked for keys whenever a
+  new block appears and one key is pressed per step of gravity, so a block
+  falls one row for every key of its placement. A game in a window instead
+  applies every waiting key on each frame <see checkClick method of Tetris
+  class>.
+  Parameters: Seed of the game, policy function, maximum number of steps of
+              gravity, a dictionary of extra Engine parameters and whether
+              to record where every block lands
+  Returns: Dictionary with the results of the game (and the list of
+           (step, block type, orientation index, row, column, cleared rows)
+           "placements" if record)
+  """
+
+  engine = Engine(seed=seed,**options)
+  keys = []
+  piece = None
+  placements = []
+  while not engine.isOver() and engine.steps < maxSteps:
+    if engine.piece is not piece:  # a new block has appeared
+      piece = engine.piece
+      if piece != None:
+        keys = list(policy(engine))
+    if keys:
+      engine.press(keys.pop(0))
+    lines = engine.lines
+    engine.step()
+    if record and piece != None and engine.piece is not piece:
+      # the block landed on this step
+      placements.append((engine.steps,piece.shape,piece.rotation,piece.row,
+                         piece.col,engine.lines-lines))
+
+  result = {"seed": engine.seed, "points": engine.points,
+            "level": engine.level, "lines": engine.lines,
+            "pieces": engine.pieces, "steps": engine.steps,
+            "duration": engine.duration,
+            "randomizer": engine.randomizer.name}
+  if record:
+    result["placements"] = placements
+  return result
+
+#-----------------------------------------------------------------------------#
+
+def _playGame(args):
+  # one-argument wrapper around playGame that Pool.imap can call
+  return playGame(*args)
+
+#-----------------------------------------------------------------------------#
+
+def summarize(values):
+  """
+  Returns a dictionary describing the distribution of a list of numbers:
+  mean, standard deviation, minimum, maximum, 10th, 50th, 90th and 99th
+  percentiles, and a histogram mapping every (rounded) value to its count
+  """
+
+  values = sorted(values)
+  n = len(values)
+  if n == 0:
+    return {"count": 0}
+  mean = sum(values)/float(n)
+  variance = sum([(v-mean)**2 for v in values])/float(n)
+  histogram = {}
+  for v in values:
+    key = int(round(v))
+    histogram[key] = histogram.get(key,0) + 1
+
+  summary = {"count": n, "mean": mean, "stdev": variance**0.5,
+             "min": values[0], "max": values[-1],
+             "p10": percentile(values,10), "p50": percentile(values,50),
+             "p90": percentile(values,90), "p99": percentile(values,99),
+             "histogram": histogram}
+  return summary
+
+#-----------------------------------------------------------------------------#
+
+def simulate(games,policy=randomPolicy,seed=0,processes=None,maxSteps=100000,
+             chunksize=64,archive=None,**options):
+  """
+  Plays a number of seeded games over a pool of processes. Game k is played
+  with seed seed+k so that every run of the same arguments gives the same
+  results whatever the number of processes.
+  Parameters: Number of games, policy function (it must be defined at the
+              top level of a module so it can be sent to other processes),
+              seed of the first game, number of processes (all cores if
+              None, no pool if 1), maximum number of steps per game, number
+              of games sent to a process at a time, the Archive object the
+              games and their placements are appended to (None to keep
+              nothing) <see archive.py> and Engine parameters like speedUp
+              or levelPoints
+  Returns: Dictionary with the distribution of points, level, lines,
+           pieces, steps and duration over all games
+  """
+
+  record = archive != None
+  jobs = [(seed+k,policy,maxSteps,options,record) for k in range(games)]
+  start = time.time()
+  if processes == 1:
+    results = map(_playGame,jobs)
+  else:
+    pool = Pool(processes)
+    results = pool.imap_unordered(_playGame,jobs,chunksize)
+  try:
+    # games are only kept as a small dictionary each, their placements go
+    # to the archive as soon as they come in
+    kept = []
+    for result in results:
+      if record:
+        archive.append(result,result.pop("placements"))
+      kept.append(result)
+    results = kept
+  finally:
+    if processes != 1:
+      pool.close()
+      pool.join()
+    if record:
+      archive.flush()
+  elapsed = time.time() - start
+
+  summary = {"games": games, "seconds": elapsed}
+  for key in ["points","level","lines","pieces","steps","duration"]:
+    summary[key] = summarize([result[key] for result in results])
+
+  return summary
+
+#-----------------------------------------------------------------------------#
+
+def main():
+  """
+  Runs simulate from the command line and prints the summary as JSON
+  """
+
+  parser = argparse.ArgumentParser(description="Simulate TETRIS games")
+  parser.add_argument("games",type=int,nargs="?",default=1000)
+  parser.add_argument("--policy",choices=sorted(POLICIES),default="random")
+  parser.add_argument("--seed",type=int,default=0)
+  parser.add_argument("--processes",type=int,default=None)
+  parser.add_argument("--max-steps",type=int,default=100000)
+  parser.add_argument("--speed-up",type=float,default=0.9)
+  parser.add_argument("--level-points",type=int,default=100)
+  parser.add_argument("--randomizer",choices=sorted(RANDOMIZERS),
+                      default="uniform")
+  parser.add_argument("--archive",default=None)
+  args = parser.parse_args()
+
+  archive = None
+  if args.archive != None:
+    archive = Archive(args.archive)
+  summary = simulate(args.games,POLICIES[args.policy],args.seed,
+                     args.processes,args.max_steps,archive=archive,
+                     speedUp=args.speed_up,levelPoints=args.level_points,
+                     randomizer=args.randomizer)
+  if archive != None:
+    archive.close()
+  print(json.dumps(summary,indent=2,sort_keys=True))
+
+#-----------------------------------------------------------------------------#
+if __name__ == "__main__": main()
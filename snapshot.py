@@ -0,0 +1,437 @@
+"""
+The program saves the whole state of a TETRIS game run by an Engine <see
+Engine class> as a compact string of bytes and restores games from it. A
+snapshot holds the board (every row as its 2 byte bit mask and one color
+code per cell), the falling piece, the score, level, gravity, game clock and
+statistics, and the state of the random generators of the engine and its
+randomizer with the block types it has queued, so a restored game goes on
+exactly like the saved one. Snapshots are read with struct.unpack_from on a
+memoryview, so restoring copies nothing but the values. A Snapshot object
+shares its bytes with its clones until one of them is changed. Snapshots are
+plain bytes, so they can be written to a file or sent to another process as
+they are.
+
+To run: python snapshot.py [games]
+"""
+
+from collections import deque
+import struct
+import sys
+import time
+
+from engine import *
+
+MAGIC = b"TTSN"
+VERSION = 1
+# magic, version, rows, columns, flags <see FLAG_*>, randomizer code <see
+# RANDOMIZER_NAMES in randomizer.py>, block type code <see BLOCK_TYPES in
+# pieces.py>, color code <see PALETTE> and orientation index of the piece
+HEADER = struct.Struct("<4sBBBBBBBB")
+# names and formats of the counters that follow the header
+COUNTERS = [("seed","Q"),("points","I"),("level","I"),("lines","I"),
+            ("pieces","I"),("steps","I"),("frames","I"),
+            ("levelPoints","I"),("winPoints","I"),("frameRate","H"),
+            ("spinned","I"),("row","h"),("col","h"),("time","d"),
+            ("clock","d"),("duration","d"),("speedUp","d")]
+STATE = struct.Struct("<" + "".join([code for name, code in COUNTERS]))
+# Mersenne Twister state of a random generator: 624 words, the position in
+# them and the next gaussian (NaN if there is none)
+RANDOM = struct.Struct("<625Id")
+# seed, size and tries of the history, number of queued block types and
+# number of block types in the history of a randomizer
+DEALER = struct.Struct("<QBBHB")
+
+FLAG_OVER = 1  # the game has ended
+FLAG_OVERFLOW = 2  # a square landed above the top row
+FLAG_PIECE = 4  # a piece is falling
+FLAG_NO_SEED = 8  # the engine has no seed
+FLAG_NO_DEALER_SEED = 16  # the randomizer has no seed
+
+# Colors of the squares of a board, by code. Code 0 is an empty cell and
+# squares of other colors are saved as grey.
+PALETTE = [None] + COLORS + ["grey"]
+PALETTE_CODES = dict([(PALETTE[k],k) for k in range(len(PALETTE))])
+SHAPE_CODES = dict([(BLOCK_TYPES[k],k) for k in range(len(BLOCK_TYPES))])
+NO_PIECE = 255  # block type code when no piece is falling
+
+# offset of every counter from the start of a snapshot <see Snapshot.set>
+OFFSETS = {}
+_offset = HEADER.size
+for _name, _code in COUNTERS:
+  OFFSETS[_name] = (struct.Struct("<" + _code),_offset)
+  _offset += struct.calcsize("<" + _code)
+
+_structs = {}  # format -> Struct object of the rows and cells of a board
+
+#-----------------------------------------------------------------------------#
+
+def packer(count,code):
+  """
+  Returns a Struct object packing count values of a format character
+  Parameters: Number of values and format character
+  """
+
+  key = "<%d%s" % (count,code)
+  if key not in _structs:
+    _structs[key] = struct.Struct(key)
+
+  return _structs[key]
+
+#-----------------------------------------------------------------------------#
+
+def packRandom(rand):
+  """
+  Returns the state of a random generator as a string of bytes
+  Parameter: Random object
+  """
+
+  version, words, gauss = rand.getstate()
+  if gauss == None:
+    gauss = float("nan")
+
+  return RANDOM.pack(*(words + (gauss,)))
+
+#-----------------------------------------------------------------------------#
+
+def unpackRandom(rand,view,offset):
+  """
+  Sets the state of a random generator from a snapshot
+  Parameters: Random object, memoryview of the snapshot and offset of the
+              state in it
+  Returns: Offset of the bytes after the state
+  """
+
+  values = RANDOM.unpack_from(view,offset)
+  gauss = values[-1]
+  if gauss != gauss:  # NaN
+    gauss = None
+  rand.setstate((3,values[:-1],gauss))
+
+  return offset + RANDOM.size
+
+#-----------------------------------------------------------------------------#
+
+def save(engine):
+  """
+  Returns the state of a game as a string of bytes
+  Parameter: Engine object of the game
+  """
+
+  board = engine.board
+  rows = board.numRows
+  cols = board.numCols
+  if cols > 16:
+    raise ValueError("snapshots hold at most 16 columns")
+  randomizer = engine.randomizer
+  piece = engine.piece
+
+  flags = 0
+  if engine.over:
+    flags |= FLAG_OVER
+  if board.overflow:
+    flags |= FLAG_OVERFLOW
+  if engine.seed == None:
+    flags |= FLAG_NO_SEED
+  if randomizer.seed == None:
+    flags |= FLAG_NO_DEALER_SEED
+  shape = color = NO_PIECE
+  rotation = spinned = row = col = 0
+  if piece != None:
+    flags |= FLAG_PIECE
+    shape = SHAPE_CODES[piece.shape]
+    color = PALETTE_CODES.get(piece.color,len(PALETTE)-1)
+    rotation = piece.rotation
+    spinned = piece.spinned
+    row = piece.row
+    col = piece.col
+
+  header = HEADER.pack(MAGIC,VERSION,rows,cols,flags,
+                       RANDOMIZER_NAMES.index(randomizer.name),shape,color,
+                       rotation)
+  state = STATE.pack(engine.seed or 0,engine.points,engine.level,
+                     engine.lines,engine.pieces,engine.steps,engine.frames,
+                     engine.levelPoints,engine.winPoints,engine.frameRate,
+                     spinned,row,col,engine.time,engine.clock,
+                     engine.duration,engine.speedUp)
+  grid = packer(rows,"H").pack(*board.grid)
+  grey = len(PALETTE)-1
+  codes = PALETTE_CODES
+  empty = [0]*cols
+  cells = []
+  for row in range(rows):
+    if board.grid[row]:
+      cells.extend([codes.get(c,grey) for c in board.colors[row]])
+    else:
+      cells.extend(empty)  # colors of empty rows are not looked at
+  colors = bytes(bytearray(cells))
+
+  history = getattr(randomizer,"history",())
+  size = getattr(history,"maxlen",0) or 0
+  queue = randomizer.queue
+  dealer = DEALER.pack(randomizer.seed or 0,size,
+                       getattr(randomizer,"tries",0),len(queue),len(history))
+  shapes = packer(len(queue)+len(history),"B").pack(
+             *[SHAPE_CODES[s] for s in queue] + \
+              [SHAPE_CODES[s] for s in history])
+
+  return b"".join([header,state,grid,colors,packRandom(engine.random),
+                   dealer,packRandom(randomizer.random),shapes])
+
+#-----------------------------------------------------------------------------#
+
+def restore(data,engine=None):
+  """
+  Restores a game from a snapshot
+  Parameters: Snapshot (string of bytes, bytearray or memoryview) and
+              optionally an Engine object of the same number of rows and
+              columns to restore the game into instead of a new one
+  Returns: Engine object of the game
+  """
+
+  view = memoryview(data)
+  if len(view) < HEADER.size + STATE.size:
+    raise ValueError("snapshot is too short")
+  magic, version, rows, cols, flags, code, shape, color, rotation = \
+    HEADER.unpack_from(view)
+  if magic != MAGIC or version != VERSION:
+    raise ValueError("not a snapshot of version %d" % (VERSION))
+  (seed, points, level, lines, pieces, steps, frames, levelPoints, winPoints,
+   frameRate, spinned, row, col, gravity, clock, duration, speedUp) = \
+    STATE.unpack_from(view,HEADER.size)
+  if flags & FLAG_NO_SEED:
+    seed = None
+  offset = HEADER.size + STATE.size
+
+  if engine == None:
+    # the seeds only save the work of seeding from the system, the states
+    # of the random generators are set below
+    randomizer = makeRandomizer(RANDOMIZER_NAMES[code],0)
+    engine = Engine(rows,cols,seed,speedUp,levelPoints,winPoints,randomizer)
+  elif engine.board.numRows != rows or engine.board.numCols != cols:
+    raise ValueError("snapshot is of a %d x %d board" % (rows,cols))
+  else:
+    engine.seed = seed
+    engine.speedUp = speedUp
+    engine.levelPoints = levelPoints
+    engine.winPoints = winPoints
+    if engine.randomizer.name != RANDOMIZER_NAMES[code]:
+      engine.randomizer = makeRandomizer(RANDOMIZER_NAMES[code],0)
+  engine.points = points
+  engine.level = level
+  engine.time = gravity
+  engine.over = flags & FLAG_OVER != 0
+  engine.frameRate = frameRate
+  engine.frames = frames
+  engine.clock = clock
+  engine.lines = lines
+  engine.pieces = pieces
+  engine.steps = steps
+  engine.duration = duration
+
+  # board: row bit masks, then one color code per cell
+  board = engine.board
+  grid = list(packer(rows,"H").unpack_from(view,offset))
+  offset += 2*rows
+  cells = packer(rows*cols,"B").unpack_from(view,offset)
+  offset += rows*cols
+  board.grid = grid
+  board.counts = [bin(line).count("1") for line in grid]
+  board.colors = [[PALETTE[c] for c in cells[r*cols:(r+1)*cols]] \
+                  if grid[r] else [None]*cols for r in range(rows)]
+  board.overflow = flags & FLAG_OVERFLOW != 0
+  board.hash = gridKey(board.keys,grid)
+
+  engine.piece = None
+  if flags & FLAG_PIECE:
+    piece = Piece(BLOCK_TYPES[shape],PALETTE[color],rows,cols)
+    piece.rotation = rotation
+    piece.state = piece.rotations[rotation]
+    piece.row = row
+    piece.col = col
+    piece.spinned = spinned
+    engine.piece = piece
+
+  # random generators and the block types the randomizer has queued
+  offset = unpackRandom(engine.random,view,offset)
+  randomizer = engine.randomizer
+  dealerSeed, size, tries, queued, remembered = DEALER.unpack_from(view,
+                                                                   offset)
+  offset += DEALER.size
+  if flags & FLAG_NO_DEALER_SEED:
+    dealerSeed = None
+  randomizer.seed = dealerSeed
+  randomizer.count = pieces
+  offset = unpackRandom(randomizer.random,view,offset)
+  shapes = [BLOCK_TYPES[s] for s in \
+            packer(queued+remembered,"B").unpack_from(view,offset)]
+  randomizer.queue = deque(shapes[:queued])
+  if size:
+    randomizer.history = deque(shapes[queued:],maxlen=size)
+    randomizer.tries = tries
+
+  return engine
+
+#-----------------------------------------------------------------------------#
+
+def clone(engine):
+  """
+  Returns a new Engine object with a copy of the state of a game, to branch
+  a game off (for example in a search of the moves ahead)
+  Parameter: Engine object of the game
+  """
+
+  return restore(save(engine))
+
+#-----------------------------------------------------------------------------#
+
+class Snapshot(object):
+
+  """
+  A class of Snapshot objects that keeps the saved state of a game. Clones
+  of a snapshot share its bytes; a snapshot gets its own copy of the bytes
+  the first time one of its values is changed <see set method>.
+  Parameter: Engine object of the game or the bytes of a snapshot
+  """
+
+  def __init__(self,source):
+
+    # set instance variables
+    if isinstance(source,Engine):
+      source = save(source)
+    self.data = source  # bytes of the snapshot, maybe shared with clones
+    self.owned = False  # True once the snapshot has its own copy
+
+#-----------------------------------------------------------------------------#
+
+  def __str__(self):
+    """
+    Returns a string of text describing the snapshot when it is printed
+    """
+
+    s = "Snapshot: %d bytes" % (len(self.data))
+    s = s + "\nPoints: %d" % (self.get("points"))
+    s = s + "\nLevel: %d" % (self.get("level"))
+
+    return s
+
+#-----------------------------------------------------------------------------#
+
+  def __len__(self):
+    return len(self.data)
+
+#-----------------------------------------------------------------------------#
+
+  def clone(self):
+    """
+    Returns a new Snapshot object sharing the bytes of this one
+    """
+
+    return Snapshot(self.data)
+
+#-----------------------------------------------------------------------------#
+
+  def get(self,name):
+    """
+    Returns one counter of the snapshot
+    Parameter: Name of the counter <see COUNTERS>
+    """
+
+    packed, offset = OFFSETS[name]
+    return packed.unpack_from(self.data,offset)[0]
+
+#-----------------------------------------------------------------------------#
+
+  def set(self,name,value):
+    """
+    Changes one counter of the snapshot, copying its bytes first if they
+    are shared
+    Parameters: Name of the counter <see COUNTERS> and its new value
+    """
+
+    if not self.owned:
+      self.data = bytearray(self.data)
+      self.owned = True
+    packed, offset = OFFSETS[name]
+    packed.pack_into(self.data,offset,value)
+
+#-----------------------------------------------------------------------------#
+
+  def restore(self,engine=None):
+    """
+    Returns the Engine object of the saved game <see restore function>
+    Parameter: Engine object to restore the game into, a new one if None
+    """
+
+    return restore(self.data,engine)
+
+#-----------------------------------------------------------------------------#
+
+def write(fileName,engine):
+  """
+  Writes the state of a game to a file
+  Parameters: Name of the file and Engine object of the game
+  """
+
+  snapshotFile = open(fileName,"wb")
+  try:
+    snapshotFile.write(save(engine))
+  finally:
+    snapshotFile.close()
+
+#-----------------------------------------------------------------------------#
+
+def read(fileName):
+  """
+  Returns the Engine object of a game saved in a file
+  Parameter: Name of the file
+  """
+
+  snapshotFile = open(fileName,"rb")
+  try:
+    data = snapshotFile.read()
+  finally:
+    snapshotFile.close()
+
+  return restore(data)
+
+#-----------------------------------------------------------------------------#
+
+def main():
+  """
+  Plays random games, snapshots them along the way and prints the size of a
+  snapshot and how long saving, restoring and cloning take
+  """
+
+  games = 20
+  if len(sys.argv) > 1:
+    games = int(sys.argv[1])
+  rand = Random(0)
+  keys = ["Left","Right","Down","Up"]
+  snapshots = []
+  for seed in range(games):
+    engine = Engine(seed=seed)
+    engine.spawn()
+    while not engine.isOver() and engine.frames < 20000:
+      if rand.random() < 0.1:
+        engine.press(rand.choice(keys))
+      engine.frame()
+      if engine.frames % 1000 == 0:
+        snapshots.append(engine)
+        engine = clone(engine)
+
+  datas = [save(engine) for engine in snapshots]
+  target = Engine()
+  timings = [("save",lambda k: save(snapshots[k])),
+             ("restore",lambda k: restore(datas[k])),
+             ("restore in place",lambda k: restore(datas[k],target)),
+             ("clone",lambda k: clone(snapshots[k]))]
+  print("%d snapshots, %d bytes each" % (len(datas),len(datas[0])))
+  for name, function in timings:
+    start = time.time()
+    for k in range(len(datas)):
+      function(k)
+    elapsed = time.time() - start
+    print("%-16s %8.1f us" % (name,1e6*elapsed/len(datas)))
+
+#-----------------------------------------------------------------------------#
+if __name__ == "__main__": main()
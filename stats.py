@@ -0,0 +1,18 @@
+"""
+Small statistics helpers shared by simulate.py, profiler.py and
+tournament.py, kept apart so that importing them pulls in nothing else.
+"""
+
+#-----------------------------------------------------------------------------#
+
+def percentile(values,p):
+  """
+  Returns the p-th percentile of a sorted list of values
+  """
+
+  if len(values) == 0:
+    return None
+  k = int(round((p/100.0)*(len(values)-1)))
+  return values[k]
+
+#-----------------------------------------------------------------------------#
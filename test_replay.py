@@ -0,0 +1,76 @@
+"""
+Tests that a seeded TETRIS game recorded in a replay <see replay.py> plays
+back to the same score, number of frames and Zobrist hash of the board.
+
+To run: python -m pytest test_replay.py
+"""
+
+import unittest
+
+from engine import *
+from ai import Player
+import replay
+
+#-----------------------------------------------------------------------------#
+
+def recordGame(seed,randomizer="uniform",frames=3000):
+  """
+  Plays a game with the computer player, pressing at most one key per frame
+  like the keyboard is read in a game
+  Parameters: Seed of the game, randomizer name and maximum number of frames
+  Returns: Engine object at the end of the game and the replay as bytes
+  """
+
+  engine = Engine(seed=seed,randomizer=randomizer)
+  recorder = replay.Recorder(engine.seed,randomizer=randomizer)
+  player = Player()
+  engine.spawn()
+  piece = None
+  keys = []
+  while engine.frames < frames and not engine.isOver():
+    if engine.piece is not piece:  # a new block has appeared
+      piece = engine.piece
+      keys = player.keys(engine) if piece != None else []
+    if keys:
+      key = keys.pop(0)
+      recorder.record(engine.frames,key)
+      engine.press(key)
+    engine.frame()
+
+  return engine, recorder.dump(engine.frames,engine.points,engine.board.hash)
+
+#-----------------------------------------------------------------------------#
+
+class ReplayTest(unittest.TestCase):
+
+  def testPlayBack(self):
+    for randomizer in RANDOMIZER_NAMES:
+      for seed in [0,1,-1]:
+        engine, data = recordGame(seed,randomizer)
+        played = replay.play(data)
+        self.assertEqual(played.points,engine.points)
+        self.assertEqual(played.frames,engine.frames)
+        self.assertEqual(played.board.hash,engine.board.hash)
+
+  def testHeader(self):
+    engine, data = recordGame(7,"bag")
+    header = replay.load(data)
+    self.assertEqual(header["seed"],7)
+    self.assertEqual(header["randomizer"],"bag")
+    self.assertEqual(header["frames"],engine.frames)
+    self.assertEqual(header["points"],engine.points)
+    self.assertEqual(header["hash"],engine.board.hash)
+
+  def testSameSeedSameReplay(self):
+    self.assertEqual(recordGame(3)[1],recordGame(3)[1])
+
+  def testCorruptReplays(self):
+    data = recordGame(2,frames=600)[1]
+    self.assertRaises(ValueError,replay.load,data[:10])
+    self.assertRaises(ValueError,replay.load,data[:-1])
+    corrupt = bytearray(data)
+    corrupt[-1] = 9  # key code of the last key press
+    self.assertRaises(ValueError,replay.load,bytes(corrupt))
+
+#-----------------------------------------------------------------------------#
+if __name__ == "__main__": unittest.main()
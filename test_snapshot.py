@@ -0,0 +1,96 @@
+"""
+Tests that a TETRIS game restored from a snapshot <see snapshot.py> goes on
+exactly like the game it was saved from.
+
+To run: python -m pytest test_snapshot.py
+"""
+
+from random import Random
+import unittest
+
+from engine import *
+import snapshot
+
+#-----------------------------------------------------------------------------#
+
+def randomKeys(seed,count):
+  """
+  Returns a list of keys (None where no key is pressed) for count frames
+  Parameters: Seed of the keys and number of frames
+  """
+
+  rand = Random(seed)
+  keys = []
+  for k in range(count):
+    if rand.random() < 0.2:
+      keys.append(rand.choice(["Left","Right","Down","Up"]))
+    else:
+      keys.append(None)
+
+  return keys
+
+#-----------------------------------------------------------------------------#
+
+def run(engine,keys):
+  """
+  Runs a game for one frame per key, pressing the key before the frame
+  Parameters: Engine object and list of keys
+  """
+
+  for key in keys:
+    if engine.isOver():
+      return
+    if key != None:
+      engine.press(key)
+    engine.frame()
+
+#-----------------------------------------------------------------------------#
+
+def state(engine):
+  """
+  Returns the values two games that went on alike have in common
+  """
+
+  board = engine.board
+  return (engine.points,engine.level,engine.lines,engine.pieces,
+          engine.frames,engine.isOver(),board.hash,board.grid,board.colors)
+
+#-----------------------------------------------------------------------------#
+
+class SnapshotTest(unittest.TestCase):
+
+  def testRestoreGoesOnAlike(self):
+    for randomizer in RANDOMIZER_NAMES:
+      for seed in [0,1,-5]:
+        keys = randomKeys(seed,6000)
+        engine = Engine(seed=seed,randomizer=randomizer)
+        engine.spawn()
+        run(engine,keys[:3000])
+        data = snapshot.save(engine)
+        restored = snapshot.restore(data)
+        self.assertEqual(state(restored),state(engine))
+        run(engine,keys[3000:])
+        run(restored,keys[3000:])
+        self.assertEqual(state(restored),state(engine))
+
+  def testRestoreIntoEngine(self):
+    engine = Engine(seed=4,randomizer="history")
+    engine.spawn()
+    run(engine,randomKeys(4,2000))
+    restored = snapshot.restore(snapshot.save(engine),Engine(randomizer="bag"))
+    self.assertEqual(snapshot.save(restored),snapshot.save(engine))
+
+  def testSaveRestoreSave(self):
+    engine = Engine(seed=2)
+    engine.spawn()
+    run(engine,randomKeys(2,1000))
+    data = snapshot.save(engine)
+    self.assertEqual(snapshot.save(snapshot.restore(data)),data)
+
+  def testCorruptSnapshots(self):
+    data = snapshot.save(Engine(seed=3))
+    self.assertRaises(ValueError,snapshot.restore,data[:8])
+    self.assertRaises(ValueError,snapshot.restore,b"XXXX" + data[4:])
+
+#-----------------------------------------------------------------------------#
+if __name__ == "__main__": unittest.main()
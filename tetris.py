@@ -5,41 +5,91 @@ Date: 28th April 2011
 
 Program Description: The program defines a Tetris class that creates a tetris
                      game as well as different operations/methods on the blocks
-                     in the game and the game screen. <see Block class> for 
-                     more details of block methods
+                     in the game and the game screen. The rules of the game are
+                     run by an Engine object <see Engine class> and the Tetris
+                     class draws its state. <see Block class> for more details
+                     of block methods
 """
 
 from graphics import *
-from random import *
-from time import *
+from random import randrange
 from block import *
-from math import *
-from functions import *
+from engine import *
+from replay import Recorder
+from renderer import Renderer
+import sys
+import time
 
 class Tetris(object):
 
   """
   A class of Tetris objects that creates a game of TETRIS
-  Parameters: None
+  Parameters: Seed of the random choice of blocks and colors (a random seed
+              is picked if None), optionally the name of a file the replay
+              of the game is saved to <see replay.py>, the name of the
+              randomizer that deals out blocks <see randomizer.py>,
+              optionally a Player object that presses the keys instead of
+              the user <see Player class>, optionally the window to draw
+              the game in (a new 200x500 GraphWin if None), optionally a
+              Profiler object that measures the time spent in every phase of
+              a frame <see Profiler class> and whether to draw the board
+              with a fixed square per cell that only changes color
+              <see Renderer class> instead of moving squares around, and
+              optionally an EventStream object the events of the game are
+              pushed to <see events.py>
   """
 
-  def __init__(self):
+  def __init__(self,seed=None,replayFile=None,randomizer="uniform",
+               player=None,win=None,profiler=None,cells=False,stream=None):
     
     width = 200
     height = 500
     lineColor = 'grey49'  #color of grid-lines
     
     #set instance variables
-    self.win = GraphWin("Tetris",width,height)
+    if win == None:
+      win = GraphWin("Tetris",width,height,autoflush=False) # the window is
+                             # redrawn once per frame <see frame method>
+    self.win = win
     self.win.setBackground('grey9')
-    self.points = 0
-    self.level = 1
-    self.squarelist = [] #list of all squares present in the game
+    if seed == None:
+      seed = randrange(2**32)
+    self.engine = Engine(25,10,seed,randomizer=randomizer) # game without
+                                           # graphics <see Engine class>
+    self.seed = self.engine.seed  # the seed and keys pressed are all a
+                                  # replay needs
+    self.replayFile = replayFile
+    self.recorder = Recorder(self.seed,25,10,self.engine.randomizer.name)
+                                     # keys pressed <see Recorder class>
+    self.stream = stream
+    self.engine.stream = stream  # events are sent to the consumers of the
+                                 # stream once per frame <see frame method>
     self.lines = [] #list of lists with the j-th list containing the squares in
                     #the j-th row of the window
     for i in range(25):
       self.lines.append([])
-    self.time = 0.65
+    self.rowTags = ["row%d" % (i) for i in range(25)] # Tk tag of the squares
+                   # of every row, so a row is moved, greyed out or deleted
+                   # with one call to the window <see animateLines>
+    self.rowCount = 25  # number of row tags made
+    self.block = None  # block that is currently falling
+    self.player = player
+    self.planned = None  # last block the player pressed keys for
+    self.animation = None  # animation of completed rows <see animateLines>
+    self.delay = 0  # number of frames before the animation goes on
+    self.paused = False
+    self.running = False
+    self.lastFrame = 0.0  # time at which the last frame was run
+    self.lag = 0.0  # seconds of game time the game clock is behind
+    self.frameEnd = None  # time at which the last call of frame ended
+    self.profiler = profiler
+    if profiler != None:
+      setProfiler(profiler)  # time drawing and Tk updates too
+      # time the collision checks too; games that are not profiled keep the
+      # plain methods so the checks cost nothing extra <see profiled method>
+      for name in ["baseClear","allLeftClear","allRightClear","spinClear"]:
+        setattr(self,name,self.profiled("collision",getattr(self,name)))
+    self.size = 0.1*width  #length of side of squares that make up each block
 
     # draw horizontal part of background grid lines
     for i in range(int(0.1*width),height,int(0.1*width)):
@@ -57,10 +107,18 @@ class Tetris(object):
       line.draw(self.win)
       line.setFill(lineColor)
 
+    # create a square for every cell if the board is drawn by a renderer,
+    # the falling block and landed squares are then only kept by the engine
+    self.renderer = None
+    if cells:
+      self.renderer = Renderer(self.win,25,10)
+    self.colors = None  # colors of the cells during the animation of
+                        # completed rows <see animateCells>
+
     # create and draw score, level and introductory message
     scorePoint = Point(0.15*width,0.15*width)
     self.scoreText = Text(scorePoint,"Score: %d\nLevel: %d" \
-        % (self.points,self.level))
+        % (self.engine.points,self.engine.level))
     self.scoreText.setFill("yellow")
     self.scoreText.setSize(10)
     self.scoreText.draw(self.win)
@@ -72,6 +130,14 @@ class Tetris(object):
     self.introText.setFill('yellow')
     self.introText.draw(self.win)
 
+    # create and draw frame time statistics if the game is profiled
+    self.profileText = None
+    if profiler != None:
+      self.profileText = Text(Point(0.7*width,0.15*width),profiler.overlay())
+      self.profileText.setSize(8)
+      self.profileText.setFill("grey70")
+      self.profileText.draw(self.win)
+
 #-----------------------------------------------------------------------------#
 
   def __str__(self):
@@ -79,13 +145,15 @@ class Tetris(object):
     Returns a string of text describing the Tetris object when it is printed
     """
 
-    s = "Current Point: %d" % (self.points)
-    s = s + "\nCurrent Level: %d" % (self.level)
-    s = s + "\nNumber of Cleared Rows: %d" % (int(0.1*self.points))
+    s = "Seed: %d" % (self.seed)
+    s = s + "\nCurrent Point: %d" % (self.engine.points)
+    s = s + "\nCurrent Level: %d" % (self.engine.level)
+    s = s + "\nNumber of Cleared Rows: %d" % (int(0.1*self.engine.points))
     
     counter = 0
-    for line in self.lines:
-      if len(line) != 0:
+    board = self.engine.board  # also holds the rows drawn by a renderer
+    for row in range(board.numRows):
+      if not board.isEmpty(row):
         counter += 1
 
     s = s + "\nCurrent height of Blocks: %d rows" % (counter)
@@ -103,48 +171,222 @@ class Tetris(object):
     self.win.getMouse()
     self.introText.undraw()
 
-    BlockTypes = ["flat","box","rightz","leftz","rightl","leftl","tee"]
-
-    while self.topClear(): # game runs till blocks fill up screen
-                           # <see topClear method>
-      shape = choice(BlockTypes) # make random choice of block type
-      block = Block(shape,self.win) # create block <see Block Class>
-      click = self.checkClick(block) # see checkClick method
-      if click == "Enter": # pause game if user clicks <Enter>
-        self.win.getMouse()
-      elif click == "ESC": # end game if user presses <Enter>
-        break
-      sleep(0.1)
-      while self.baseClear(block): # move block down as while its base is clear
-                                   # of other blocks <see baseClear method>
-        block.moveDown()
-        click = self.checkClick(block)
-        if click == "Return": # pause game if user presses <Enter>
-          self.introText.setText('game paused...\nclick any key to continue')
-          self.introText.draw(self.win)
-          self.win.getKey()
-          self.introText.undraw()
-        elif click == "ESC": # break out of loop if user presses <ESC>
-          break
-        sleep(self.time)
-      if click == "ESC": #end game if user pressed <ESC> in the prior loop
-        break
-
-      # add all squares in block to the list of all squares
-      for square in block.getBlock():
-        self.squarelist.append(square)
-      self.addToLine(block) # add each square in block to its appropriate line
-      A = self.checkLines(block)
-      self.points += A #update points
-      self.updateScore()  #print new score on window
-      if self.points > 0 and self.points%100 == 0 and A != 0:
-        self.time *= 0.9  # increase block speed
-        self.level = self.level + 1 # increase level
-        self.updateScore()  #print new level on screen
-        if self.points == 2000:
-          break # end game at 1000 points
+    # run frames of the game from the Tk event loop till the game ends
+    # <see frame method>
+    self.running = True
+    self.lastFrame = time.time()
+    self.win.after(0,self.frame)
+    self.win.mainloop()
+
+    if self.replayFile != None:
+      self.recorder.save(self.replayFile,self.engine.frames,
+                         self.engine.points,self.getHash())
+    if self.profiler != None:
+      self.profiler.dump()  # see dump method of Profiler class
+      setProfiler(None)
+    if self.stream != None:
+      self.stream.close()  # last events of the game go to the consumers
     
-    self.fareWell()
+    if not self.win.isClosed():
+      self.fareWell()
+
+#-----------------------------------------------------------------------------#
+
+  def frame(self):
+    """
+    This method is called by the Tk event loop. It runs as many steps of the
+    game as the time since the last call is worth, one step every
+    1/frameRate seconds of game time <see tick method>, and asks Tk to call
+    it again when the next step is due. Tk redraws the window between calls.
+    """
+
+    if self.win.isClosed():  # closed with the button of the title bar
+      self.running = False
+      self.win.quit()
+      return
+
+    now = time.time()
+    profiler = self.profiler
+    if profiler != None and self.frameEnd != None:
+      profiler.add("wait",now - self.frameEnd) # time Tk spent redrawing the
+                                               # window or waiting
+    step = 1.0/self.engine.frameRate
+    # catch up on at most a quarter of a second if the window was held up
+    self.lag = min(self.lag + now - self.lastFrame,0.25)
+    self.lastFrame = now
+    while self.lag >= step and self.running:
+      self.lag -= step
+      if profiler != None:
+        profiler.startFrame()
+        self.tick()
+        profiler.endFrame()
+        if profiler.frames % 30 == 0:
+          self.profileText.setText(profiler.overlay())
+      else:
+        self.tick()
+    if self.renderer != None:
+      self.profile("render",self.render)  # once per call, see render method
+    if self.stream != None:
+      self.profile("events",self.stream.flush)
+
+    if self.running:
+      wait = int(1000*(step - self.lag))
+      self.win.after(max(wait,1),self.frame)
+    else:
+      self.win.quit()  # leave the Tk event loop started in play
+    self.frameEnd = time.time()
+
+#-----------------------------------------------------------------------------#
+
+  def tick(self):
+    """
+    This method runs one step of the game: it checks the keyboard, goes on
+    with the animation of completed rows, creates new blocks and moves the
+    falling block down when the clock of the engine says so
+    """
+
+    if self.player != None and self.block != None and \
+       self.block is not self.planned and not self.paused:
+      # the player presses its keys as soon as the block can be moved
+      self.planned = self.block
+      for key in self.player.keys(self.engine):
+        self.win.pushKey(key)
+
+    # the time spent is added to the profiler if there is one
+    # <see profile method>
+    if self.block == None or self.animation != None or self.paused:
+      # only <ESC> and <ENTER> work now
+      click = self.profile("keys",self.checkControls)
+    else:
+      click = self.profile("keys",self.checkClick,self.block) # see
+                                                              # checkClick
+    if click == "ESC": # end game if user presses <ESC>
+      self.running = False
+      return
+    elif click == "Return" or (self.paused and click != None):
+      self.pause() # pause or continue game <see pause method>
+    if self.paused:
+      return
+
+    if self.animation != None: # let completed rows finish disappearing
+      self.profile("animation",self.animate)
+      return
+
+    if self.block == None:
+      if self.engine.isOver(): # game runs till blocks fill up screen
+        self.running = False   # <see isOver method of Engine class>
+        return
+      piece = self.engine.spawn() # make random choice of block type
+      if self.engine.isOver(): # no room left at the top for the new block
+        self.running = False
+        return
+      self.block = self.profile("spawn",Block,piece.shape,self.win,piece,
+                                self.renderer == None) # <see Block Class>
+
+    if self.engine.tick(): # time for the block to drop one step
+      if self.baseClear(self.block): # <see baseClear method>
+        self.profile("gravity",self.block.moveDown)
+      else:
+        self.profile("gravity",self.land)
+
+#-----------------------------------------------------------------------------#
+
+  def profile(self,name,function,*args):
+    """
+    This method calls a function and, if the game is profiled, adds the time
+    it took to a phase of the profiler <see Profiler class>
+    Parameter(s): Name of the phase, function and its arguments
+    Returns: What the function returns
+    """
+
+    profiler = self.profiler
+    if profiler == None:
+      return function(*args)
+    start = profiler.begin()
+    result = function(*args)
+    profiler.end(name,start)
+
+    return result
+
+#-----------------------------------------------------------------------------#
+
+  def profiled(self,name,function):
+    """
+    This method returns a function that calls a function and adds the time
+    it took to a phase of the profiler <see profile method>
+    Parameter(s): Name of the phase and function
+    """
+
+    def timed(*args):
+      return self.profile(name,function,*args)
+
+    return timed
+
+#-----------------------------------------------------------------------------#
+
+  def render(self):
+    """
+    This method brings the cells of the renderer up to date with the landed
+    squares (or the rows of the animation of completed rows) and the falling
+    block. Only cells whose color changed are redrawn <see Renderer class>.
+    """
+
+    colors = self.colors
+    if colors == None:
+      colors = self.engine.board.colors
+    if self.block != None:
+      piece = self.block.getPiece()
+      self.renderer.render(colors,piece.getCells(),piece.color)
+    else:
+      self.renderer.render(colors)
+
+#-----------------------------------------------------------------------------#
+
+  def land(self):
+    """
+    This method adds the falling block to the landed squares once its base
+    is not clear any more and starts the animation of completed rows
+    """
+
+    self.addToLine(self.block) # add each square in block to its appropriate
+                               # line
+    A = self.checkLines(self.block)
+    # update points, increase block speed and level every 100 points and
+    # end game at 2000 points <see addPoints method of Engine class>
+    self.engine.addPoints(A)
+    self.updateScore()  #print new score and level on window
+    self.block = None
+
+#-----------------------------------------------------------------------------#
+
+  def pause(self):
+    """
+    This method pauses the game or lets a paused game go on
+    """
+
+    self.paused = not self.paused
+    if self.paused:
+      self.introText.setText('game paused...\nclick any key to continue')
+      self.introText.draw(self.win)
+    else:
+      self.introText.undraw()
+
+#-----------------------------------------------------------------------------#
+
+  def animate(self):
+    """
+    This method moves the animation of completed rows on by one step of the
+    game <see animateLines method>
+    """
+
+    if self.delay > 0:
+      self.delay -= 1
+      return
+    try:
+      seconds = next(self.animation)
+      self.delay = int(round(seconds*self.engine.frameRate)) - 1
+    except StopIteration:
+      self.animation = None
 
 #-----------------------------------------------------------------------------#
 
@@ -153,7 +395,8 @@ class Tetris(object):
     This method updates the score and level display on the screen
     """
 
-    self.scoreText.setText("Score: %d\nLevel: %d" % (self.points,self.level))
+    self.scoreText.setText("Score: %d\nLevel: %d" \
+        % (self.engine.points,self.engine.level))
 
 #-----------------------------------------------------------------------------#
 
@@ -162,7 +405,8 @@ class Tetris(object):
     This method prints the final game message
     """
 
-    fareWell = "Game Over!\nYou had %d points.\nClick anywhere" % (self.points)
+    fareWell = "Game Over!\nYou had %d points.\nClick anywhere" \
+        % (self.engine.points)
     fareWell = fareWell + " to quit."
     self.introText.setText(fareWell)
     self.introText.draw(self.win)
@@ -176,7 +420,7 @@ class Tetris(object):
     This method prints the instruction on the command line
     """
 
-    print '*'*80
+    print('*'*80)
     intro = "\nWelcome to TETRIS v.1.0.\nBelow are the playing instructions:\n"
     intro = intro + "CONTROLS:\n========\n-->  Move Right\n<--  Move Left\n"
     intro = intro + "<Down Arrow>  Move Two Steps at a Time\n<Up Arrow>  "
@@ -187,19 +431,42 @@ class Tetris(object):
     intro = intro + "You can press <ESC> at anytime to QUIT the game\nYou "
     intro = intro + "can press <ENTER> at anytime to pause the game\nENJOY..."
     intro = intro + "\n"
-    print intro
-    print '*'*80
+    print(intro)
+    print('*'*80)
+
+#-----------------------------------------------------------------------------#
+
+  def checkControls(self):
+    """
+    This method checks for <ESC> and <ENTER> while there is no block to move.
+    Returns: "ESC" or "Return" if one of them was pressed, or else the first
+             other key pressed since the last check
+    """
+
+    first = None
+    for click, when in self.win.drainKeys(): # all keys pressed since last
+                                             # check, oldest first
+      if click == "Escape": # if user presses <ESC> button
+        return "ESC"
+      elif click == "Return": # if user presses <ENTER>/<RETURN>
+        return "Return"
+      elif first == None:
+        first = click
+
+    return first
 
 #-----------------------------------------------------------------------------#
 
   def checkClick(self,block):
     """
-    This method checks for user click
+    This method checks for user click. Every key pressed since the last check
+    is applied in the order they were pressed.
     Parameter(s): Block Object
     """
 
-    click = self.win.checkKey()
-    if click != None:  # if there was a user click
+    for click, when in self.win.drainKeys(): # <see drainKeys in graphics.py>
+      # keys are applied before the clock of the engine runs its next frame
+      self.recorder.record(self.engine.frames,click)
       # if user presses left arrow key and the leftside of block is clear
       # <see allLeftClear method>
       if click == "Left" and self.allLeftClear(block):
@@ -211,7 +478,9 @@ class Tetris(object):
       # if user presses down arrow key and the base of block is clear
       elif click == "Down" and self.baseClear(block):
         block.moveDown()
-      elif click == "Up": # rotate block if user presses up arrow key
+      # rotate block if user presses up arrow key and block has room to spin
+      # <see spinClear method>
+      elif click == "Up" and self.spinClear(block):
         block.spin()
       elif click == "Escape": # if user presses <ESC> button
         return "ESC"
@@ -223,20 +492,39 @@ class Tetris(object):
   def addToLine(self,block):
     """
     This method adds all the squares in a block to their respective list of
-    lines.
+    lines and places the block on the board of the game engine.
     Parameter(s): Block Object
     """
     
-    width = self.win.getWidth()
-    for square in block.getBlock():
-      squaresides = getSides(square)  # see <getSides function> in functions.py
-      bottom = squaresides[-1]
-
-      # add square to the appropriate list of lines
-      for i in range(25):
-        if int(bottom) == int((25-i)*0.1*width):
-          self.lines[i].append(square)
+    self.engine.place(block.getPiece())
+    block.release()  # squares are moved row by row from now on
+    numRows = self.engine.board.numRows
+    squares = block.getBlock()
+    cells = block.getCells()  # the k-th square covers the k-th cell
+    rows = {}  # row -> squares of the block in it
+    for k in range(len(squares)):
+      row = cells[k][0]
+
+      # add square to the list of the row it covers
+      if 0 <= row < numRows:
+        self.lines[row].append(squares[k])
+        rows.setdefault(row,[]).append(squares[k])
+
+    # add the squares to the tags of their rows
+    for row in rows:
+      self.win.addTag(self.rowTags[row],*rows[row])
     
+#-----------------------------------------------------------------------------#
+
+  def getHash(self):
+    """
+    Returns the Zobrist hash of the landed squares, which is kept up to date
+    by addToLine and checkLines <see Board class>. Equal boards have equal
+    hashes.
+    """
+
+    return self.engine.board.hash
+
 #-----------------------------------------------------------------------------#
 
   def topClear(self):
@@ -244,12 +532,7 @@ class Tetris(object):
     This method checks if blocks have piled up to the top of the window.
     """
 
-    for square in self.squarelist:
-      sides = getSides(square) # get boundaries of square
-      if int(sides[2]) <= 0:  # if top of any block is at the top of window
-        return False
-    
-    return True
+    return self.engine.topClear()
 
 #-----------------------------------------------------------------------------#
 
@@ -260,28 +543,7 @@ class Tetris(object):
     Parameter(s): Block Object
     """
    
-    boundaries = block.getBoundaries()  # get coordinate boundaries of block
-    bottom = int(boundaries[3])
-    if bottom == self.win.getHeight():  # if block is at the base of window
-      return False
-    result = 0
-    for square in block.getBlock():
-      squaresides = getSides(square)  # get square boundaries
-      for box in self.squarelist:
-        boxsides = getSides(box)  # get box boundaries
-
-        # check if base of square and top of box share the same y-coordinate and
-        # if they share either the same left or right x-coordinate
-        if int(squaresides[3]) == int(boxsides[2]) and \
-            (int(squaresides[1]) == int(boxsides[1]) or \
-            int(squaresides[0]) == int(boxsides[0])):
-              result += 1
-              # return False if any one such pair of square and box is found
-              if result != 0:
-                return False
-
-    return True
-        
+    return self.engine.baseClear(block.getPiece())
 
 #-----------------------------------------------------------------------------#
 
@@ -292,29 +554,18 @@ class Tetris(object):
     Parameter(s): Block Object
     """
     
-    # check if block is at the left end of window
-    boundaries = block.getBoundaries()
-    left = boundaries[0]
-    #left = int(boundaries[0])
-    if left <= 0:
-      return False
-
-    # check if the left side of block is clear of other blocks
-    result = 0
-    for square in block.getBlock():
-      squaresides = getSides(square)
-      for box in self.squarelist:
-        boxsides = getSides(box)
-        # check if the left side of square and the right side of box share the 
-        # same x-coordinate and if they share the same top y-coordinate
-        #if squaresides[0] <= boxsides[1] and squaresides[2] >= boxsides[2]:
-        if int(squaresides[0]) == int(boxsides[1]) and \
-            int(squaresides[2]) == int(boxsides[2]):
-          result += 1
-          if result != 0: # break loop and return False if any pair is found
-            return False
-
-    return True
+    return self.engine.leftClear(block.getPiece())
+
+#-----------------------------------------------------------------------------#
+
+  def spinClear(self,block):
+    """
+    This method checks if a block can spin without running into other blocks
+    or the sides of the window
+    Parameter(s): Block Object
+    """
+
+    return self.engine.spinClear(block.getPiece())
 
 #-----------------------------------------------------------------------------#
 
@@ -325,98 +576,130 @@ class Tetris(object):
     Parameter(s): Block Object
     """
 
-    # check if block is at the right end of window
-    boundaries = block.getBoundaries()
-    right = int(boundaries[1])
-    if right >= self.win.getWidth():
-      return False
-
-    # check if the right side of block is clear of other blocks
-    result = 0
-    for square in block.getBlock():
-      squaresides = getSides(square)
-      for box in self.squarelist:
-        boxsides = getSides(box)
-        # check if the right side of square and the left side of box share the 
-        # same x-coordinate and if they share the same top y-coordinate
-        #if squaresides[1] >= boxsides[0] and squaresides[2] == boxsides[2]:
-        if int(squaresides[1]) == int(boxsides[0]) and \
-            int(squaresides[2]) == int(boxsides[2]):
-          result += 1
-          if result != 0: # break loop and return False if any pair is found
-            return False
-
-    return True
+    return self.engine.rightClear(block.getPiece())
 
 #-----------------------------------------------------------------------------#
 
   def checkLines(self,block):
     """
-    This method checks if any row of the window is filled with squares
+    This method checks if any row of the window is filled with squares and
+    starts the animation that removes completed rows <see animateLines>
     Parameter(s): Block Object
     Returns: Number of points earned (10 points per completed row)
     """
     
+    completeLines = 0  # initiate number of complete rows
     if self.baseClear(block) == False: # check rows only when block stops moving
-      completeLines = 0  # initiate number of complete rows
-      i = 0
-      while i <= 24:  # check all until the last (top) row
-        line = self.lines[i]
-        if len(line) == 10: # 10 squares fill a row on the window
-          completeLines += 1
-
-          # set color of all squares in completed row to grey
-          for m in range(len(line)):
-            square = line[m]
-            square.setFill('grey')
-          
-          sleep(0.5)
-
-          # undraw and remove all squares in the row from the general list of
-          # all squares
-          for n in range(len(line)):
-            square = line[n]
-            self.squarelist.remove(square)
-            square.undraw()
-            sleep(0.05)
-          
-          sleep(0.7)
-
-          # create a list of all lists (rows) above the completed row
-          aboveLine = self.lines[(i+1):]
-          # move all squares above completed row one step down
-          for lines in aboveLine:
-            if len(lines) != 0:
-              for squares in lines:
-                squares.move(0,0.1*self.win.getWidth())
-          
-          self.lines.remove(line)  # delete list correponding to completed row
-          self.lines.append([]) # add a new empty list as the topmost row since
-                                # all rows above completed row are now one step
-                                # down (index-wise) due to the removal of the
-                                # full list (completed row).
-          # the counter i is not increased here because if for example, the i-th
-          # and (i+1)th rows are filled; the i-th row is removed, then the
-          # (i+1)th row moves down and becomes the new i-th row, thus the i-th 
-          # row has to be checked again.
-        else: # if line is not full, move to next line (next list)
-          i = i + 1
+      if self.renderer != None: # the animation starts from the rows as they
+                                # are before completed rows are removed
+        colors = [list(line) for line in self.engine.board.colors]
+      # remove completed rows from the board of the game engine, only rows
+      # covered by the block are checked and the indices of the rows come in
+      # the order they were removed <see clearLines method of Engine class>
+      rows = self.profile("lines",self.engine.clearLines,block.getPiece())
+      completeLines = len(rows)
+      if completeLines != 0 and self.renderer != None:
+        self.colors = colors
+        self.animation = self.animateCells(rows)
+      elif completeLines != 0:
+        self.animation = self.animateLines(rows)
     
     points = completeLines*10 # calculate points earned
     
     return points
   
+#-----------------------------------------------------------------------------#
+
+  def animateLines(self,rows):
+    """
+    This method greys out and removes completed rows from the window and
+    moves the squares above them down. It is a generator that yields the
+    number of seconds to wait before it goes on, so that the game keeps
+    running while rows disappear <see animate method>
+    Parameter(s): List of indices of completed rows in order of removal
+    """
+
+    size = 0.1*self.win.getWidth()
+    for i in rows:
+      line = self.lines[i]
+
+      # set color of all squares in completed row to grey
+      self.win.configTag(self.rowTags[i],fill='grey')
+      
+      yield 0.5
+
+      # undraw all squares in the row
+      for n in range(len(line)):
+        square = line[n]
+        square.undraw()
+        yield 0.05
+      
+      yield 0.7
+
+      # move all squares above completed row one step down with a single
+      # call for the tags of all the rows above it
+      above = [self.rowTags[j] for j in range(i+1,len(self.lines)) \
+               if len(self.lines[j]) != 0]
+      if above:
+        self.win.moveTag(above,0,size)
+      
+      self.win.deleteTag(self.rowTags[i]) # its squares are undrawn already
+      del self.lines[i]  # delete list correponding to completed row
+      self.lines.append([]) # add a new empty list as the topmost row since
+                            # all rows above completed row are now one step
+                            # down (index-wise) due to the removal of the
+                            # full list (completed row).
+      del self.rowTags[i]  # the tags of the rows above move down with them
+      self.rowTags.append("row%d" % (self.rowCount))
+      self.rowCount += 1
+
+#-----------------------------------------------------------------------------#
+
+  def animateCells(self,rows):
+    """
+    This method is the animation of completed rows when the board is drawn
+    by a renderer. It changes the colors in self.colors (the rows as they
+    were before completed rows were removed) the way animateLines changes
+    squares, and the renderer redraws the cells that changed.
+    Parameter(s): List of indices of completed rows in order of removal
+    """
+
+    colors = self.colors
+    numCols = self.engine.board.numCols
+    for i in rows:
+      # set color of all cells in completed row to grey
+      colors[i] = ['grey']*numCols
+
+      yield 0.5
+
+      # empty the cells of the row one at a time
+      for n in range(numCols):
+        colors[i][n] = None
+        yield 0.05
+
+      yield 0.7
+
+      # move all rows above completed row one step down
+      del colors[i]
+      colors.append([None]*numCols)
+
+    self.colors = None  # draw the landed squares of the engine again
+
 #-----------------------------------------------------------------------------#
 
 def main():
   """
-  Test program to run Game
+  Test program to run Game. The replay of the game is saved to the file
+  named by the first command line argument if there is one.
   """
 
-  game = Tetris()
-  print game
+  replayFile = None
+  if len(sys.argv) > 1:
+    replayFile = sys.argv[1]
+  game = Tetris(replayFile=replayFile)
+  print(game)
   game.play()
-  print game
+  print(game)
 
 #-----------------------------------------------------------------------------#
 if __name__ == "__main__": main()
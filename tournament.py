@@ -0,0 +1,428 @@
+"""
+The program hosts many TETRIS games at once in a single asyncio event loop.
+Every game is an Engine <see Engine class> with its own gravity timer on the
+loop, so games at different levels drop their blocks at their own speed and
+no game needs a window or a thread. Players send one command per line over a
+local TCP socket or standard input:
+
+  NEW [seed] [randomizer]  ->  GAME id seed
+  KEY id Left|Right|Down|Up
+  STATE id  ->  STATE id points level lines over hash
+  WATCH id  ->  EVENT id kind frame ... <see events.py>
+  QUIT id
+  STATS     ->  STATS {json}
+
+and get "OVER id points lines" when one of their games ends. The host
+measures how late the gravity timers fire (jitter) and how much CPU the
+games use, which gives the number of games one core can host. A loopback
+client plays random keys on many games to load it.
+
+Requires Python 3.7 or later.
+
+To run: python tournament.py serve [--port N] [--stdin]
+        python tournament.py loopback [--games N] [--seconds S]
+"""
+
+from collections import deque
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from engine import *
+from stats import percentile
+
+PORT = 8021
+JITTER_WINDOW = 10000  # number of timer wake-ups the jitter statistics use
+KEYS = ["Left","Right","Down","Up"]
+WATCH_LIMIT = 65536  # bytes waiting to be sent to a player before the events
+                     # of the games it watches are held back
+
+class Game(object):
+
+  """
+  A class of Game objects that keeps one hosted game
+  Parameters: Id of the game, seed, randomizer name and the writer of the
+              connection that created it
+  """
+
+  def __init__(self,gameId,seed,randomizer,writer):
+
+    # set instance variables
+    self.id = gameId
+    self.engine = Engine(seed=seed,randomizer=randomizer)
+    self.engine.spawn()
+    self.writer = writer
+    self.deadline = 0.0  # loop time at which the next step of gravity is due
+    self.timer = None  # handle of the gravity timer on the event loop
+    self.stream = None  # EventStream of a watched game <see watch method>
+
+#-----------------------------------------------------------------------------#
+
+class Host(object):
+
+  """
+  A class of Host objects that runs games on an asyncio event loop and
+  answers the commands of players
+  Parameter: Event loop
+  """
+
+  def __init__(self,loop):
+
+    # set instance variables
+    self.loop = loop
+    self.games = {}  # id -> Game object of every running game
+    self.count = 0  # number of games created
+    self.steps = 0  # number of steps of gravity run
+    self.late = 0  # number of steps more than one gravity interval late
+    self.jitter = deque(maxlen=JITTER_WINDOW)  # seconds timers were late
+    self.started = time.time()
+    self.cpuStarted = time.process_time()
+
+#-----------------------------------------------------------------------------#
+
+  def newGame(self,seed,randomizer,writer):
+    """
+    Creates a game and starts its gravity timer
+    Parameters: Seed (a random one if None), randomizer name and writer of
+                the connection of the player
+    Returns: Game object
+    """
+
+    if seed == None:
+      seed = randrange(2**32)
+    game = Game(self.count+1,seed,randomizer,writer)
+    self.count += 1  # only once the randomizer name was found good
+    self.games[game.id] = game
+    game.deadline = self.loop.time() + game.engine.time
+    game.timer = self.loop.call_at(game.deadline,self.step,game)
+
+    return game
+
+#-----------------------------------------------------------------------------#
+
+  def step(self,game):
+    """
+    Runs one step of gravity of a game when its timer fires and sets the
+    timer for the next one
+    Parameter: Game object
+    """
+
+    now = self.loop.time()
+    self.jitter.append(now - game.deadline)
+    engine = game.engine
+    engine.step()
+    self.steps += 1
+    if engine.isOver():
+      self.endGame(game)
+      return
+
+    # the next step is due one gravity interval after this one was, but a
+    # game that fell behind starts again from now rather than catching up
+    # with a burst of steps
+    game.deadline += engine.time
+    if game.deadline < now:
+      game.deadline = now
+      self.late += 1
+    game.timer = self.loop.call_at(game.deadline,self.step,game)
+    if game.stream != None:
+      self.forward(game)
+
+#-----------------------------------------------------------------------------#
+
+  def watch(self,game):
+    """
+    Sends the events of a game to its player from now on. Events wait in a
+    stream while the connection is backed up, and the oldest are dropped
+    if too many pile up.
+    Parameter: Game object
+    """
+
+    if game.stream != None:
+      return
+    game.stream = EventStream(drop=True)
+    game.engine.stream = game.stream
+    write = lambda text: self.send(game.writer,text[:-1])
+    game.stream.subscribe(writeEvents(write,"EVENT %d " % (game.id)))
+
+#-----------------------------------------------------------------------------#
+
+  def forward(self,game):
+    """
+    Sends the waiting events of a watched game to its player unless the
+    connection is backed up
+    Parameter: Game object
+    """
+
+    writer = game.writer
+    if writer == None or writer.is_closing():
+      return
+    transport = getattr(writer,"transport",None)
+    if transport == None or \
+       transport.get_write_buffer_size() < WATCH_LIMIT:
+      game.stream.flush()
+
+#-----------------------------------------------------------------------------#
+
+  def endGame(self,game):
+    """
+    Stops a game and tells its player how it ended
+    Parameter: Game object
+    """
+
+    if game.timer != None:
+      game.timer.cancel()
+    self.games.pop(game.id,None)
+    if game.stream != None:
+      self.forward(game)  # the last events, GameOver among them
+      game.stream.close()
+    engine = game.engine
+    self.send(game.writer,"OVER %d %d %d" % (game.id,engine.points,
+                                              engine.lines))
+
+#-----------------------------------------------------------------------------#
+
+  def send(self,writer,line):
+    """
+    Writes a line to a player
+    Parameters: Writer of the connection of the player and text of the line
+    """
+
+    if writer != None and not writer.is_closing():
+      writer.write((line + "\n").encode())
+
+#-----------------------------------------------------------------------------#
+
+  def stats(self):
+    """
+    Returns a dictionary with the number of games, steps of gravity, timer
+    jitter percentiles in milliseconds and CPU use of the host
+    """
+
+    wall = max(time.time() - self.started,1e-9)
+    cpu = time.process_time() - self.cpuStarted
+    jitter = sorted(self.jitter)
+    usage = cpu/wall  # fraction of a core used by the host
+    stats = {"games": len(self.games), "created": self.count,
+             "steps": self.steps, "late": self.late,
+             "stepsPerSecond": self.steps/wall,
+             "jitterP50Ms": 1000*(percentile(jitter,50) or 0),
+             "jitterP99Ms": 1000*(percentile(jitter,99) or 0),
+             "jitterMaxMs": 1000*(jitter[-1] if jitter else 0),
+             "cpuSeconds": cpu, "wallSeconds": wall,
+             "gamesPerCore": len(self.games)/max(usage,1e-9)}
+    return stats
+
+#-----------------------------------------------------------------------------#
+
+  def command(self,line,writer):
+    """
+    Carries out one command of a player <see the description of the
+    program at the top of the file>
+    Parameters: Text of the command and writer of the connection
+    Returns: Text of the answer, or None if there is no answer
+    """
+
+    words = line.split()
+    if not words:
+      return None
+    name = words[0].upper()
+    try:
+      if name == "NEW":
+        seed = None
+        if len(words) > 1:
+          seed = int(words[1])
+        randomizer = "uniform"
+        if len(words) > 2:
+          randomizer = words[2]
+        game = self.newGame(seed,randomizer,writer)
+        return "GAME %d %d" % (game.id,game.engine.seed)
+      elif name == "STATS":
+        return "STATS " + json.dumps(self.stats(),sort_keys=True)
+
+      game = self.games.get(int(words[1]))
+      if game == None:
+        return "ERROR no game %s" % (words[1])
+      if name == "KEY":
+        game.engine.press(words[2])  # the key is applied right away
+        return None
+      elif name == "STATE":
+        engine = game.engine
+        return "STATE %d %d %d %d %d %016x" % (game.id,engine.points,
+            engine.level,engine.lines,engine.isOver(),engine.board.hash)
+      elif name == "WATCH":
+        self.watch(game)
+        return None
+      elif name == "QUIT":
+        self.endGame(game)
+        return None
+    except (IndexError,ValueError) as error:
+      return "ERROR %s" % (error)
+
+    return "ERROR unknown command %s" % (name)
+
+#-----------------------------------------------------------------------------#
+
+  async def serve(self,reader,writer):
+    """
+    Reads the commands of one player till the connection is closed. Games
+    of the player end with the connection.
+    Parameters: Stream reader and writer of the connection
+    """
+
+    try:
+      while True:
+        line = await reader.readline()
+        if not line:
+          break
+        answer = self.command(line.decode(),writer)
+        if answer != None:
+          self.send(writer,answer)
+        await writer.drain()
+    except ConnectionResetError:
+      pass  # the player went away without closing the connection
+    finally:  # also when the host shuts down and cancels the task
+      for game in list(self.games.values()):
+        if game.writer is writer:
+          game.writer = None
+          self.endGame(game)
+      writer.close()
+
+#-----------------------------------------------------------------------------#
+
+class StdoutWriter(object):
+
+  """
+  A class of writer objects that write to standard output like the stream
+  writer of a connection, so that players can use standard input and
+  output <see serve method of Host class>
+  """
+
+  def write(self,data):
+    sys.stdout.buffer.write(data)
+    sys.stdout.buffer.flush()
+
+  def is_closing(self):
+    return False
+
+  async def drain(self):
+    pass
+
+  def close(self):
+    pass
+
+#-----------------------------------------------------------------------------#
+
+async def serveStdin(host):
+  """
+  Reads commands from standard input and answers on standard output
+  Parameter: Host object
+  """
+
+  loop = asyncio.get_running_loop()
+  reader = asyncio.StreamReader()
+  await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader),
+                               sys.stdin)
+  await host.serve(reader,StdoutWriter())
+
+#-----------------------------------------------------------------------------#
+
+async def loopback(port,games=200,seconds=10.0,keyRate=4.0,seed=0):
+  """
+  Plays many games on a host over a local connection, pressing random keys,
+  and starts a new game whenever one ends so the number of games stays the
+  same
+  Parameters: Port of the host, number of games, number of seconds to play,
+              number of keys pressed per second in every game and seed of
+              the games and keys
+  Returns: Dictionary of statistics of the host at the end
+  """
+
+  reader, writer = await asyncio.open_connection("127.0.0.1",port)
+  rand = Random(seed)
+  running = set()
+  result = {}
+
+  async def read():
+    # keep track of the games of the client from the answers of the host
+    while True:
+      line = await reader.readline()
+      if not line:
+        return
+      words = line.decode().split(" ",1)
+      if words[0] == "GAME":
+        running.add(int(words[1].split()[0]))
+      elif words[0] == "OVER":
+        running.discard(int(words[1].split()[0]))
+        writer.write(("NEW %d\n" % (rand.randrange(2**32))).encode())
+      elif words[0] == "STATS":
+        result.update(json.loads(words[1]))
+        return
+
+  readTask = asyncio.ensure_future(read())
+  for k in range(games):
+    writer.write(("NEW %d\n" % (seed+k)).encode())
+  await writer.drain()
+
+  interval = 0.05  # seconds between two batches of keys
+  end = time.time() + seconds
+  while time.time() < end:
+    await asyncio.sleep(interval)
+    lines = []
+    for gameId in running:
+      if rand.random() < keyRate*interval:
+        lines.append("KEY %d %s\n" % (gameId,rand.choice(KEYS)))
+    writer.write("".join(lines).encode())
+    await writer.drain()
+
+  writer.write(b"STATS\n")
+  await writer.drain()
+  await readTask
+  writer.close()
+  await writer.wait_closed()
+
+  return result
+
+#-----------------------------------------------------------------------------#
+
+async def run(args):
+  """
+  Runs the host, and the loopback client if asked to
+  Parameter: Parsed command line arguments <see main>
+  """
+
+  host = Host(asyncio.get_running_loop())
+  if args.mode == "serve" and args.stdin:
+    await serveStdin(host)
+    return
+  server = await asyncio.start_server(host.serve,"127.0.0.1",args.port)
+  async with server:
+    if args.mode == "serve":
+      await server.serve_forever()
+    else:
+      stats = await loopback(args.port,args.games,args.seconds)
+      print(json.dumps(stats,indent=2,sort_keys=True))
+
+#-----------------------------------------------------------------------------#
+
+def main():
+  """
+  Runs the host (or the host and the loopback client) from the command line
+  """
+
+  parser = argparse.ArgumentParser(description="Host many TETRIS games")
+  parser.add_argument("mode",choices=["serve","loopback"])
+  parser.add_argument("--port",type=int,default=PORT)
+  parser.add_argument("--stdin",action="store_true")
+  parser.add_argument("--games",type=int,default=200)
+  parser.add_argument("--seconds",type=float,default=10.0)
+  args = parser.parse_args()
+
+  try:
+    asyncio.run(run(args))
+  except KeyboardInterrupt:
+    pass
+
+#-----------------------------------------------------------------------------#
+if __name__ == "__main__": main()